@@ -3,10 +3,11 @@
 This package contains agent classes and utilities for LangGraph integration.
 """
 
-from .base_agent import BaseAgent
+from .base_agent import AgentResult, BaseAgent
 from .trip_agent import TripAgent
 
 __all__ = [
+    'AgentResult',
     'BaseAgent',
     'TripAgent'
 ]
\ No newline at end of file
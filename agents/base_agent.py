@@ -1,40 +1,334 @@
 """Base agent class for LangGraph integration."""
 
-from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional, Generator
+import asyncio
+import functools
+import heapq
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from dataclasses import dataclass
+from itertools import count, islice
+from operator import itemgetter
+from typing import Dict, Any, AsyncGenerator, Callable, List, Optional, Generator, Tuple, Union
+import logging
+import sys
 import threading
+from types import MappingProxyType
 from tools import get_all_tools, TOOL_REGISTRY
+from tools.executor import run_tool_calls
 
-class BaseAgent(ABC):
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Number of session lock shards; must stay a power of two for the mask below
+_LOCK_SHARDS = 32
+
+# Known message roles mapped to (interned role, title-cased label)
+_ROLES = {r: (sys.intern(r), r.title()) for r in ("user", "assistant", "system", "tool")}
+
+# Share of max_sessions evicted per sweep, so the scan over all sessions runs
+# once per many new sessions rather than on every one
+_EVICT_FRACTION = 0.1
+
+# Formatted history of a session with no messages
+_EMPTY_HISTORY = "No previous conversation."
+
+# Source of history versions. Global and monotonic, so a version number is
+# never reused even after a session is cleared and recreated.
+_VERSION_COUNTER = count(1)
+
+# Last history returned by get_session_history in the current thread/task,
+# as (session_id, version, messages). Versions are globally unique, so no agent
+# reference is needed to tell agents apart, and none is kept alive by a
+# long-lived worker thread.
+_CURRENT_HISTORY: ContextVar[Optional[Tuple[str, int, Tuple]]] = ContextVar(
+    "current_history", default=None
+)
+
+# Encoding for models tiktoken does not know (Gemini, Llama, ...); an
+# approximation of their tokenizers that is close enough for a budget
+_DEFAULT_ENCODING = "cl100k_base"
+
+# Set once an encoding fails to load (e.g. its BPE file cannot be
+# downloaded), after which token counts use the estimate instead of
+# retrying the download on every request
+_encoding_unavailable = False
+
+@functools.lru_cache(maxsize=32)
+def _get_encoding(model: Optional[str]):
+    """Get the tiktoken encoding for a model, loading it on first use.
+    
+    Args:
+        model: Model name, or None for the default encoding
+        
+    Returns:
+        The model's encoding, cl100k_base for models tiktoken does not
+        know, or None if tiktoken is missing or cannot load the encoding
+    """
+    global _encoding_unavailable
+    if tiktoken is None or _encoding_unavailable:
+        return None
+    try:
+        if model:
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                pass
+        return tiktoken.get_encoding(_DEFAULT_ENCODING)
+    except Exception as e:
+        _encoding_unavailable = True
+        logger.warning("Could not load tiktoken encoding, estimating history tokens instead: %s", e)
+        return None
+
+def _count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Count prompt tokens in text.
+    
+    Uses the model's tiktoken encoding when it can be loaded. Without
+    tiktoken, or when its encoding files cannot be fetched, falls back to
+    the common estimate of four characters per token.
+    
+    Args:
+        text: Text to measure
+        model: Model the text is sent to, if known
+        
+    Returns:
+        Token count
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+# Worker pool for process_batch. Separate from the tool pool, since batch
+# items run tool calls on that pool and must not wait on their own workers.
+_BATCH_WORKERS = 8
+_batch_executor: Optional[ThreadPoolExecutor] = None
+_batch_executor_lock = threading.Lock()
+
+def _gevent_patched() -> bool:
+    """Check whether gevent has monkey-patched the process (gevent workers)."""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched("socket")
+
+def _map_concurrently(func: Callable, *iterables) -> List:
+    """Call func over iterables concurrently, like map.
+    
+    Under gevent workers each call runs on a greenlet, so blocking provider
+    calls yield to the hub as usual. Elsewhere the calls run on a shared
+    thread pool.
+    
+    Args:
+        func: Function to call
+        *iterables: Argument iterables, as for map
+        
+    Returns:
+        Results in input order
+    """
+    if _gevent_patched():
+        from gevent.pool import Pool
+        return Pool(_BATCH_WORKERS).map(lambda args: func(*args), list(zip(*iterables)))
+    
+    global _batch_executor
+    if _batch_executor is None:
+        with _batch_executor_lock:
+            if _batch_executor is None:
+                _batch_executor = ThreadPoolExecutor(max_workers=_BATCH_WORKERS, thread_name_prefix="agent-batch")
+    return list(_batch_executor.map(func, *iterables))
+
+# Tool list shared by every agent built without an explicit tool set
+_ALL_TOOLS_CACHE: Optional[Tuple] = None
+
+def _get_all_tools_cached() -> Tuple:
+    """Get all registered tools, building the shared tuple on first use.
+    
+    Returns:
+        Tuple of all tool functions
+    """
+    global _ALL_TOOLS_CACHE
+    if _ALL_TOOLS_CACHE is None:
+        _ALL_TOOLS_CACHE = tuple(get_all_tools())
+    return _ALL_TOOLS_CACHE
+
+# State field types, parameterized once at import
+_MESSAGES_T = List[Dict[str, str]]
+_OPTIONAL_STR_T = Optional[str]
+_RESULTS_T = Optional[Dict[str, Any]]
+
+# LangGraph state schema; identical for every agent
+_STATE_SCHEMA = MappingProxyType({
+    "messages": _MESSAGES_T,
+    "session_id": str,
+    "current_tool": _OPTIONAL_STR_T,
+    "tool_results": _RESULTS_T,
+    "thinking": _OPTIONAL_STR_T,
+    "final_response": _OPTIONAL_STR_T
+})
+
+# Initial LangGraph state; copied per session, messages and session_id filled in
+_INITIAL_TEMPLATE = {
+    "messages": None,
+    "session_id": None,
+    "current_tool": None,
+    "tool_results": None,
+    "thinking": None,
+    "final_response": None
+}
+
+class _Msg:
+    """Compact session history entry.
+    
+    Stores the interned role alongside its pre-computed title so history
+    formatting never calls str.title(). Content is kept as UTF-8 bytes,
+    which is smaller than str for non-Latin-1 text and is decoded only when
+    read. Internal to the agent: public methods hand out as_dict() copies.
+    """
+    
+    __slots__ = ("role", "title", "_content")
+    
+    def __init__(self, role: str, title: str, content: str):
+        self.role = role
+        self.title = title
+        self._content = content.encode("utf-8")
+    
+    @property
+    def content(self) -> str:
+        return self._content.decode("utf-8")
+    
+    @property
+    def content_bytes(self) -> bytes:
+        return self._content
+    
+    def as_dict(self) -> Dict[str, str]:
+        return {"role": self.role, "content": self.content}
+
+def _make_msg(role: str, content: str) -> _Msg:
+    """Build a history entry, interning the role and its title."""
+    role, title = _ROLES.get(role) or (sys.intern(role), role.title())
+    return _Msg(role, title, content)
+
+@dataclass(slots=True)
+class AgentResult:
+    """Result of processing a single message.
+    
+    Passed between an agent's internal steps by attribute instead of as a
+    string-keyed dict; to_dict() serializes it once, when process_message
+    returns.
+    """
+    
+    response: str
+    success: bool
+    provider: str
+    model: str
+    session_id: str
+    error: Optional[str] = None
+    rate_limited: bool = False
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the result as a response dict."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+class BaseAgent:
     """Base agent class that provides common functionality for all agents.
     
     This class is designed to be compatible with LangGraph integration
     and provides the foundation for building stateful, tool-enabled agents.
+    Subclasses must implement create_system_prompt, process_message and
+    stream_response, and should declare their own __slots__.
     """
     
-    def __init__(self, llm_provider=None, tools: Optional[List] = None):
+    __slots__ = (
+        "_llm_provider", "tools", "tool_registry", "_lock_shards",
+        "default_max_history", "session_histories", "_fmt_cache",
+        "_versions", "_system_prompt", "max_sessions", "evicted_sessions",
+        "_evict_lock", "session_store", "_store_versions",
+    )
+    
+    def __init__(self, llm_provider=None, tools: Optional[List] = None, max_history: int = 200,
+                 max_sessions: Optional[int] = None, session_store=None):
         """Initialize the base agent.
         
         Args:
             llm_provider: The LLM provider instance
             tools: List of tools available to the agent
+            max_history: Upper bound on messages retained per session
+            max_sessions: Upper bound on sessions kept in memory; the least
+                recently written sessions are evicted beyond it. None means
+                no bound
+            session_store: Optional shared store (e.g. RedisSessionStore)
+                that every message is written through to; the local copy of
+                a session is reloaded from it whenever the stored version
+                has moved on
         """
         self.llm_provider = llm_provider
-        self.tools = tools or get_all_tools()
+        self.tools = tools or _get_all_tools_cached()
         self.tool_registry = TOOL_REGISTRY
-        self.session_lock = threading.Lock()
-        self.session_histories = {}
+        self._lock_shards = [threading.Lock() for _ in range(_LOCK_SHARDS)]
+        self.default_max_history = max_history
+        self.session_histories: Dict[str, deque] = {}
+        # session_id -> (newest message, max_messages, max_tokens, formatted
+        # history). Every append creates a new message object, so an identity
+        # check on the newest message detects changes even once a deque is full.
+        self._fmt_cache: Dict[str, Tuple["_Msg", int, Optional[int], Optional[str], str]] = {}
+        # session_id -> version, bumped under the shard lock on every change
+        self._versions: Dict[str, int] = {}
+        self._system_prompt: Optional[str] = None
+        self.max_sessions = max_sessions
+        self.evicted_sessions = 0
+        self._evict_lock = threading.Lock()
+        self.session_store = session_store
+        # session_id -> session store version the local history reflects
+        self._store_versions: Dict[str, int] = {}
         
-    @abstractmethod
     def create_system_prompt(self) -> str:
         """Create the system prompt for the agent.
         
         Returns:
             str: The system prompt
         """
-        pass
+        raise NotImplementedError
+    
+    @property
+    def llm_provider(self):
+        """The LLM provider serving this agent."""
+        return self._llm_provider
+    
+    @llm_provider.setter
+    def llm_provider(self, provider):
+        self._llm_provider = provider
+        self._on_provider_change(provider)
+    
+    def _on_provider_change(self, provider):
+        """Hook called whenever the LLM provider is set or switched.
+        
+        Subclasses override this to refresh anything derived from the
+        provider, such as its name or provider-specific handlers.
+        
+        Args:
+            provider: The new LLM provider instance, or None
+        """
+    
+    @property
+    def system_prompt(self) -> str:
+        """System prompt for the agent, built once per instance.
+        
+        Returns:
+            str: The system prompt
+        """
+        if self._system_prompt is None:
+            self._system_prompt = self.create_system_prompt()
+        return self._system_prompt
+    
+    @system_prompt.setter
+    def system_prompt(self, value: str):
+        self._system_prompt = value
     
-    @abstractmethod
     def process_message(self, message: str, session_id: str = "default") -> Dict[str, Any]:
         """Process a message and return a response.
         
@@ -45,10 +339,9 @@ class BaseAgent(ABC):
         Returns:
             Dict containing the response and metadata
         """
-        pass
+        raise NotImplementedError
     
-    @abstractmethod
-    def stream_response(self, message: str, session_id: str = "default") -> Generator[str, None, None]:
+    def stream_response(self, message: str, session_id: str = "default") -> Generator[Union[str, bytes], None, None]:
         """Stream a response for the given message.
         
         Args:
@@ -56,21 +349,245 @@ class BaseAgent(ABC):
             session_id: Session identifier
             
         Yields:
-            str: Streaming response chunks
+            Streaming response chunks, as str or pre-encoded bytes
+        """
+        raise NotImplementedError
+    
+    async def aprocess_message(self, message: str, session_id: str = "default") -> Dict[str, Any]:
+        """Process a message without blocking the event loop.
+        
+        Providers expose blocking clients only, so the LLM call runs in a
+        worker thread while the loop keeps serving other sessions.
+        
+        Args:
+            message: The user message
+            session_id: Session identifier
+            
+        Returns:
+            Dict containing the response and metadata
+        """
+        return await asyncio.to_thread(self.process_message, message, session_id)
+    
+    async def astream_response(self, message: str, session_id: str = "default") -> AsyncGenerator[Union[str, bytes], None]:
+        """Stream a response without blocking the event loop.
+        
+        Each chunk, including any streaming delay, is pulled from
+        stream_response in a worker thread.
+        
+        Args:
+            message: The user message
+            session_id: Session identifier
+            
+        Yields:
+            Streaming response chunks, as str or pre-encoded bytes
         """
-        pass
+        chunks = self.stream_response(message, session_id)
+        done = object()
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, done)
+            if chunk is done:
+                return
+            yield chunk
     
-    def get_session_history(self, session_id: str) -> List[Dict[str, str]]:
+    async def aprocess_batch(self, messages: List[str], session_ids: List[str]) -> List[Dict[str, Any]]:
+        """Process several messages concurrently.
+        
+        Messages for the same session may complete in any order, so give
+        each item its own session when history order matters.
+        
+        Args:
+            messages: User messages
+            session_ids: Session identifier for each message
+            
+        Returns:
+            Response dicts in the same order as messages
+        """
+        if len(messages) != len(session_ids):
+            raise ValueError("messages and session_ids must have the same length")
+        return await asyncio.gather(
+            *(self.aprocess_message(message, session_id) for message, session_id in zip(messages, session_ids))
+        )
+    
+    def process_batch(self, messages: List[str], session_ids: List[str]) -> List[Dict[str, Any]]:
+        """Process several messages concurrently from synchronous code.
+        
+        Runs the items on greenlets under gevent workers and on a shared
+        thread pool elsewhere, without starting an event loop per call.
+        Messages for the same session may complete in any order, so give
+        each item its own session when history order matters.
+        
+        Args:
+            messages: User messages
+            session_ids: Session identifier for each message
+            
+        Returns:
+            Response dicts in the same order as messages
+        """
+        if len(messages) != len(session_ids):
+            raise ValueError("messages and session_ids must have the same length")
+        return _map_concurrently(self.process_message, messages, session_ids)
+    
+    def _lock_for(self, session_id: str) -> threading.Lock:
+        """Get the lock shard guarding writes to a session.
+        
+        Reads do not take this lock; it serializes creating, appending to,
+        clearing and rebuilding a session's history.
+        
+        Args:
+            session_id: Session identifier
+            
+        Returns:
+            The lock shared by all sessions hashing to the same shard
+        """
+        return self._lock_shards[hash(session_id) & (_LOCK_SHARDS - 1)]
+    
+    def _install_history(self, session_id: str, messages: List[Tuple[str, str]],
+                         store_version: int) -> Optional[deque]:
+        """Replace a session's local history with messages read from the store.
+        
+        Must be called with the session's shard lock held.
+        
+        Args:
+            session_id: Session identifier
+            messages: (role, content) pairs, oldest first
+            store_version: Session store version the messages reflect
+            
+        Returns:
+            The new history, or None if there are no messages
+        """
+        self._fmt_cache.pop(session_id, None)
+        if not messages:
+            self.session_histories.pop(session_id, None)
+            self._versions.pop(session_id, None)
+            self._store_versions.pop(session_id, None)
+            return None
+        history = deque(
+            (_make_msg(role, content) for role, content in messages),
+            maxlen=self.default_max_history
+        )
+        self.session_histories[session_id] = history
+        self._versions[session_id] = next(_VERSION_COUNTER)
+        self._store_versions[session_id] = store_version
+        return history
+    
+    def _sync_session(self, session_id: str) -> Optional[deque]:
+        """Bring a session's local history up to date with the session store.
+        
+        The local copy is kept while its store version matches the stored
+        one, and reloaded when another process has written to or cleared
+        the session since. If the store cannot be read, the local copy is
+        used as is.
+        
+        Args:
+            session_id: Session identifier
+            
+        Returns:
+            The session's current history, or None if it has no messages
+        """
+        store = self.session_store
+        version = store.version(session_id)
+        if version is None or version == self._store_versions.get(session_id, 0):
+            return self.session_histories.get(session_id)
+        # Read before taking the shard lock, so other sessions never wait on it
+        version, messages = store.load(session_id)
+        if version is None:
+            return self.session_histories.get(session_id)
+        with self._lock_for(session_id):
+            # A concurrent append in this process may already be newer
+            if version <= self._store_versions.get(session_id, 0):
+                return self.session_histories.get(session_id)
+            history = self._install_history(session_id, messages, version)
+        if history is not None and self.max_sessions is not None and len(self.session_histories) > self.max_sessions:
+            self._evict_sessions()
+        return history
+    
+    def _evict_sessions(self):
+        """Evict the least recently written sessions beyond max_sessions.
+        
+        Session versions come from a global counter bumped on every write,
+        so the smallest versions belong to the least recently written
+        sessions. Each sweep also frees a further _EVICT_FRACTION of
+        max_sessions, amortizing the scan over many new sessions. Evicted
+        sessions stay in the session store, if any, and are reloaded from
+        it when next used.
+        """
+        # One sweep at a time; concurrent creators skip rather than wait
+        if not self._evict_lock.acquire(blocking=False):
+            return
+        try:
+            excess = len(self.session_histories) - self.max_sessions
+            if excess <= 0:
+                return
+            target = excess + int(self.max_sessions * _EVICT_FRACTION)
+            # list() copies the items in one step, safe against concurrent inserts
+            oldest = heapq.nsmallest(target, list(self._versions.items()), key=itemgetter(1))
+            for session_id, version in oldest:
+                with self._lock_for(session_id):
+                    # Leave sessions written to since the scan
+                    if self._versions.get(session_id) != version:
+                        continue
+                    self.session_histories.pop(session_id, None)
+                    self._versions.pop(session_id, None)
+                    self._fmt_cache.pop(session_id, None)
+                    self._store_versions.pop(session_id, None)
+                    self.evicted_sessions += 1
+        finally:
+            self._evict_lock.release()
+    
+    def _snapshot(self, session_id: str, max_messages: Optional[int] = None) -> Tuple[int, Tuple[_Msg, ...]]:
+        """Copy a session's history without taking its lock.
+        
+        The copy is retried if the session's version changes while it is
+        being taken, so it never mixes messages from before and after a
+        concurrent append.
+        
+        Args:
+            session_id: Session identifier
+            max_messages: Copy only this many recent messages, or all if None
+            
+        Returns:
+            Tuple of (version the copy reflects, copied messages)
+        """
+        versions = self._versions
+        while True:
+            version = versions.get(session_id, 0)
+            history = self.session_histories.get(session_id)
+            if history is None:
+                return version, ()
+            start = 0 if max_messages is None else max(0, len(history) - max_messages)
+            try:
+                items = tuple(islice(history, start, None))
+            except RuntimeError:
+                # Mutated mid-copy, which the GIL normally rules out
+                continue
+            if versions.get(session_id, 0) == version:
+                return version, items
+    
+    def get_session_history(self, session_id: str) -> Tuple[Dict[str, str], ...]:
         """Get conversation history for a session.
         
         Args:
             session_id: Session identifier
             
         Returns:
-            List of conversation messages
+            Immutable snapshot of the conversation messages as
+            {"role", "content"} dicts, safe to iterate without holding the
+            session lock
         """
-        with self.session_lock:
-            return self.session_histories.get(session_id, [])
+        if self.session_store is not None:
+            self._sync_session(session_id)
+        
+        # Repeat reads within one request reuse the last result while the
+        # session's version is unchanged, skipping the copy and the decoding
+        cached = _CURRENT_HISTORY.get()
+        if (cached is not None and cached[0] == session_id
+                and cached[1] == self._versions.get(session_id, 0)):
+            return cached[2]
+        
+        version, snapshot = self._snapshot(session_id)
+        messages = tuple(msg.as_dict() for msg in snapshot)
+        _CURRENT_HISTORY.set((session_id, version, messages))
+        return messages
     
     def add_to_history(self, session_id: str, role: str, content: str):
         """Add a message to session history.
@@ -80,13 +597,68 @@ class BaseAgent(ABC):
             role: Message role (user/assistant)
             content: Message content
         """
-        with self.session_lock:
-            if session_id not in self.session_histories:
-                self.session_histories[session_id] = []
-            self.session_histories[session_id].append({
-                "role": role,
-                "content": content
-            })
+        message = _make_msg(role, content)
+        with self._lock_for(session_id):
+            if self.session_store is not None:
+                created = self._append_through_store(session_id, message)
+            else:
+                created = self._append_local(session_id, message)
+        
+        # Evict outside the shard lock; the sweep takes other sessions' shards
+        if created and self.max_sessions is not None and len(self.session_histories) > self.max_sessions:
+            self._evict_sessions()
+    
+    def _append_local(self, session_id: str, message: _Msg) -> bool:
+        """Append a message to the local history, creating it if missing.
+        
+        Must be called with the session's shard lock held.
+        
+        Args:
+            session_id: Session identifier
+            message: Message to add
+            
+        Returns:
+            True if the session was created
+        """
+        history = self.session_histories.get(session_id)
+        created = history is None
+        if created:
+            # Bounded ring buffer: old messages fall off on append
+            history = deque(maxlen=self.default_max_history)
+            self.session_histories[session_id] = history
+        history.append(message)
+        self._versions[session_id] = next(_VERSION_COUNTER)
+        self._fmt_cache.pop(session_id, None)
+        return created
+    
+    def _append_through_store(self, session_id: str, message: _Msg) -> bool:
+        """Add a message to the session store and the local history.
+        
+        Must be called with the session's shard lock held, so the store
+        version returned by the append and the local copy are updated
+        together. If the version shows another process wrote to the session
+        since it was last synced, the history is reloaded from the store,
+        which already holds the new message.
+        
+        Args:
+            session_id: Session identifier
+            message: Message to add
+            
+        Returns:
+            True if the session was created in memory
+        """
+        store = self.session_store
+        version = store.append(session_id, message.role, message.content)
+        if version is not None and version != self._store_versions.get(session_id, 0) + 1:
+            stored_version, messages = store.load(session_id)
+            if stored_version is not None:
+                created = session_id not in self.session_histories
+                self._install_history(session_id, messages, stored_version)
+                return created
+        created = self._append_local(session_id, message)
+        if version is not None:
+            self._store_versions[session_id] = version
+        return created
     
     def clear_session_history(self, session_id: str):
         """Clear history for a specific session.
@@ -94,9 +666,31 @@ class BaseAgent(ABC):
         Args:
             session_id: Session identifier
         """
-        with self.session_lock:
-            if session_id in self.session_histories:
-                del self.session_histories[session_id]
+        if self.session_store is not None:
+            self.session_store.clear(session_id)
+            self._store_versions.pop(session_id, None)
+        # Lock-free check for the common missing-session case; a racing
+        # clear is harmless since the deletes below are idempotent
+        if session_id not in self.session_histories:
+            return
+        with self._lock_for(session_id):
+            self.session_histories.pop(session_id, None)
+            self._versions.pop(session_id, None)
+            self._fmt_cache.pop(session_id, None)
+    
+    @staticmethod
+    def _is_bounded(history: Optional[deque], max_messages: int) -> bool:
+        """Check whether a history already keeps at most max_messages.
+        
+        Args:
+            history: Session history, or None if the session does not exist
+            max_messages: Maximum number of messages to keep
+            
+        Returns:
+            True if optimize_memory has nothing to do
+        """
+        # Appends to a deque bounded this tightly trim automatically
+        return history is None or (history.maxlen is not None and history.maxlen <= max_messages)
     
     def optimize_memory(self, session_id: str, max_messages: int = 20):
         """Optimize memory by keeping only recent messages.
@@ -105,37 +699,76 @@ class BaseAgent(ABC):
             session_id: Session identifier
             max_messages: Maximum number of messages to keep
         """
-        with self.session_lock:
-            if session_id in self.session_histories:
-                history = self.session_histories[session_id]
-                if len(history) > max_messages:
-                    # Keep the most recent messages
-                    self.session_histories[session_id] = history[-max_messages:]
+        # The deque tracks its own length and bound, so the common no-op case
+        # is decided without the lock and rechecked once it is held
+        if self._is_bounded(self.session_histories.get(session_id), max_messages):
+            return
+        with self._lock_for(session_id):
+            history = self.session_histories.get(session_id)
+            if self._is_bounded(history, max_messages):
+                return
+            # Rebuild once with the tighter bound, keeping the most recent messages
+            self.session_histories[session_id] = deque(
+                islice(history, max(0, len(history) - max_messages), None),
+                maxlen=max_messages
+            )
+            self._versions[session_id] = next(_VERSION_COUNTER)
+            self._fmt_cache.pop(session_id, None)
     
-    def format_conversation_history(self, session_id: str, max_messages: int = 10) -> str:
+    def format_conversation_history(self, session_id: str, max_messages: int = 10,
+                                    max_tokens: Optional[int] = None,
+                                    model: Optional[str] = None) -> str:
         """Format conversation history for prompt inclusion.
         
         Args:
             session_id: Session identifier
             max_messages: Maximum number of recent messages to include
+            max_tokens: Token budget for the formatted history; older messages
+                are dropped until it fits, always keeping the newest. None or 0
+                means no budget
+            model: Model the history is sent to, selecting the tokenizer
+                used for the budget
             
         Returns:
             Formatted conversation history
         """
-        history = self.get_session_history(session_id)
+        # New and cleared sessions return without touching the snapshot or cache
+        if self.session_store is not None:
+            history = self._sync_session(session_id)
+        else:
+            history = self.session_histories.get(session_id)
         if not history:
-            return "No previous conversation."
+            return _EMPTY_HISTORY
         
-        # Get recent messages
-        recent_history = history[-max_messages:] if len(history) > max_messages else history
+        # Reuse the last formatting while the history is unchanged
+        fmt_cache = self._fmt_cache
+        cached = fmt_cache.get(session_id)
+        if (cached and cached[0] is history[-1] and cached[1] == max_messages
+                and cached[2] == max_tokens and cached[3] == model):
+            return cached[4]
         
-        formatted = []
-        for msg in recent_history:
-            role = msg.get("role", "unknown")
-            content = msg.get("content", "")
-            formatted.append(f"{role.title()}: {content}")
-        
-        return "\n".join(formatted)
+        _, recent_history = self._snapshot(session_id, max_messages)
+        if not recent_history:
+            return _EMPTY_HISTORY
+        last_message = recent_history[-1]
+        # str.join builds a list from a generator anyway, so hand it an
+        # exact-size list directly and skip the generator frame
+        lines = [f"{msg.title}: {msg.content}" for msg in recent_history]
+        if max_tokens:
+            # Keep the newest lines that fit the budget
+            budget = max_tokens
+            start = len(lines) - 1
+            budget -= _count_tokens(lines[start], model)
+            while start > 0:
+                cost = _count_tokens(lines[start - 1], model)
+                if cost > budget:
+                    break
+                budget -= cost
+                start -= 1
+            lines = lines[start:]
+        result = "\n".join(lines)
+        fmt_cache[session_id] = (last_message, max_messages, max_tokens, model, result)
+        return result
     
     def get_available_tools(self) -> List[str]:
         """Get list of available tool names.
@@ -155,30 +788,46 @@ class BaseAgent(ABC):
         Returns:
             Tool execution result
         """
-        if tool_name in self.tool_registry:
-            tool_func = self.tool_registry[tool_name]
-            try:
-                return tool_func(**kwargs)
-            except Exception as e:
-                return f"Error executing {tool_name}: {str(e)}"
-        else:
+        tool_func = self.tool_registry.get(tool_name)
+        if tool_func is None:
             return f"Tool {tool_name} not found"
+        try:
+            return tool_func(**kwargs)
+        except Exception as e:
+            return f"Error executing {tool_name}: {str(e)}"
+    
+    def execute_tools(self, calls: List[Tuple[str, Dict[str, Any]]], timeout: float = 10.0) -> List[str]:
+        """Execute independent tool calls concurrently.
+        
+        All calls start at once, so the batch takes about as long as its
+        slowest tool rather than the sum of all of them. A tool still
+        running after the timeout is reported as timed out; its worker
+        finishes in the background.
+        
+        Args:
+            calls: (tool name, keyword arguments) pairs
+            timeout: Seconds to wait for the whole batch
+            
+        Returns:
+            Tool results in the same order as calls
+        """
+        results = run_tool_calls(
+            [(tool_name, functools.partial(self.execute_tool, tool_name, **kwargs)) for tool_name, kwargs in calls],
+            timeout
+        )
+        return [
+            result if result is not None else f"Tool {tool_name} timed out after {timeout:g}s"
+            for (tool_name, _), result in zip(calls, results)
+        ]
     
     # LangGraph compatibility methods
     def get_state_schema(self) -> Dict[str, Any]:
         """Get the state schema for LangGraph integration.
         
         Returns:
-            Dictionary defining the agent state schema
+            Read-only mapping defining the agent state schema
         """
-        return {
-            "messages": List[Dict[str, str]],
-            "session_id": str,
-            "current_tool": Optional[str],
-            "tool_results": Optional[Dict[str, Any]],
-            "thinking": Optional[str],
-            "final_response": Optional[str]
-        }
+        return _STATE_SCHEMA
     
     def create_initial_state(self, session_id: str = "default") -> Dict[str, Any]:
         """Create initial state for LangGraph.
@@ -187,13 +836,10 @@ class BaseAgent(ABC):
             session_id: Session identifier
             
         Returns:
-            Initial state dictionary
+            Initial state dictionary; messages are plain {"role", "content"}
+            dicts, so the state stays JSON-serializable
         """
-        return {
-            "messages": self.get_session_history(session_id),
-            "session_id": session_id,
-            "current_tool": None,
-            "tool_results": None,
-            "thinking": None,
-            "final_response": None
-        }
\ No newline at end of file
+        state = _INITIAL_TEMPLATE.copy()
+        state["messages"] = [dict(msg) for msg in self.get_session_history(session_id)]
+        state["session_id"] = session_id
+        return state
@@ -1,15 +1,178 @@
 """Trip Agent implementation."""
 
+import copy
+import hashlib
 import json
+import logging
+import re
+import threading
 import time
-from typing import Dict, Any, Generator
-from langsmith import traceable
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Callable, Dict, Any, Final, Generator, Optional, Tuple
 
-from .base_agent import BaseAgent
-from tools import get_all_tools
+from .base_agent import AgentResult, BaseAgent
 from config import Config
-from output_parser import OutputParser, TokenType
+from tracing import traceable
+from output_parser import OutputParser, TokenType, batch_tokens, dumps_json_bytes
 from openai_streaming_handler import OpenAIStreamingHandler
+from response_cache import ResponseCache
+from semantic_cache import SemanticCache
+from session_store import RedisSessionStore
+from stream_validator import StreamingToolValidator
+from tools import KNOWN_CITIES
+
+if TYPE_CHECKING:
+    from llm_factory import BaseLLMProvider
+
+logger = logging.getLogger(__name__)
+
+# Static prompt text, kept byte-identical across turns so providers can reuse
+# their prefix cache
+_SYSTEM_PROMPT: Final[str] = """You are a helpful travel planning assistant. You have access to the following tools:
+
+1. **weather_tool(location)** - Get current weather information for any location
+2. **time_tool(timezone)** - Get current time, optionally for a specific timezone
+3. **city_facts_tool(city)** - Get interesting facts and information about cities
+4. **plan_city_visit_tool(city, days, interests)** - Create detailed travel plans for city visits
+
+When users ask about travel, weather, time, or city information, use the appropriate tools to provide accurate and helpful responses.
+
+Always be friendly, informative, and helpful. If you need to use a tool, clearly indicate what information you're looking up.
+
+For travel planning, consider factors like:
+- Weather conditions
+- Local time zones
+- Popular attractions and cultural sites
+- Local cuisine and dining recommendations
+- Transportation options
+- Best times to visit
+
+Provide practical, actionable advice that helps users plan amazing trips!"""
+
+_THINKING_PROMPT: Final[str] = """Before responding, think through your approach:
+
+<thinking>
+- What information does the user need?
+- Which tools should I use to get this information?
+- How can I provide the most helpful response?
+</thinking>
+
+Then provide your response."""
+
+# Static prompt sent ahead of every turn, joined once
+_STATIC_PROMPT: Final[str] = f"{_SYSTEM_PROMPT}\n\n{_THINKING_PROMPT}"
+
+# Per-turn prompt; only the history window and user message vary
+_TURN_PROMPT_FRAME: Final[str] = "Conversation History:\n{history}\n\nUser: {message}"
+
+# Structural stream tokens, emitted without streaming delay
+_CONTROL_TOKEN_TYPES: Final[frozenset] = frozenset({
+    TokenType.THINKING_START, TokenType.THINKING_END,
+    TokenType.TOOL_CALL_START, TokenType.TOOL_CALL_END,
+    TokenType.TOOL_RESULT_START, TokenType.TOOL_RESULT_END,
+    TokenType.COMPLETE
+})
+
+# Terminal SSE frame, encoded once
+_SSE_COMPLETE: Final[bytes] = b"data: " + dumps_json_bytes({'token': '', 'type': TokenType.COMPLETE.value}) + b"\n\n"
+
+# Exact-match cache of deterministic LLM responses, shared by all agents
+_response_cache = ResponseCache(
+    Config.RESPONSE_CACHE_SIZE, Config.RESPONSE_CACHE_TTL, Config.RESPONSE_CACHE_REDIS_URL
+)
+
+# Similarity cache for paraphrased first-turn queries; opt-in via config
+_semantic_cache = SemanticCache(Config.SEMANTIC_CACHE_MODEL, Config.SEMANTIC_CACHE_THRESHOLD)
+if not (Config.SEMANTIC_CACHE_ENABLED and _semantic_cache.available):
+    _semantic_cache = None
+
+# Plan cache: intent templates mapped to the tool-call sequence that answers
+# them, seeded from demonstrations. Argument values name the intent's slots;
+# each result becomes a titled section of the reply.
+_PLAN_CACHE: Final = MappingProxyType({
+    "city_visit": (
+        ("weather_tool", {"location": "city"}, "Weather"),
+        ("city_facts_tool", {"city": "city"}, "About {city}"),
+        ("plan_city_visit_tool", {"city": "city", "days": "days"}, "Itinerary"),
+    ),
+})
+
+# Reply framing for each plan-cache intent
+_PLAN_REPLY_INTROS: Final = MappingProxyType({
+    "city_visit": "Here's what I put together for your {days}-day visit to {city}.",
+})
+
+# Recognizers for plan-cache intents, e.g. "Plan me 3 days in Paris" or
+# "Can you plan a 2-day trip to Tokyo?". The whole message must be the
+# request: anything after the city (another question, an interest) makes
+# it a turn for the LLM.
+_PLAN_INTENTS: Final = (
+    ("city_visit", re.compile(
+        r"^(?:(?:can|could|would|will)\s+you\s+)?(?:please\s+)?"
+        r"(?:plan|make|create|build)\s+(?:me\s+|us\s+)?(?:an?\s+)?"
+        r"(?P<days>\d{1,2})[\s-]*days?(?:\s+(?:trip|visit|itinerary|stay))?"
+        r"\s+(?:in|to|for|at)\s+(?P<city>[a-z]+(?:[ .'-][a-z]+){0,2}?)"
+        r"(?:,?\s+please)?\s*[?.!]*$",
+        re.IGNORECASE
+    )),
+)
+
+def _match_plan_intent(message: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Match a message against the plan-cache intent templates.
+    
+    Only cities the tools have data for qualify; any other city is left to
+    the LLM, which can still say something useful about it.
+    
+    Args:
+        message: The user message
+        
+    Returns:
+        (template name, slot values) for the first matching template, or None
+    """
+    for template, pattern in _PLAN_INTENTS:
+        match = pattern.match(message.strip())
+        if match:
+            days = int(match.group("days"))
+            city = match.group("city").casefold()
+            if 1 <= days <= 14 and city in KNOWN_CITIES:
+                return template, {"city": city.title(), "days": days}
+    return None
+
+def _response_cache_key(llm_provider, system_prompt: str, prompt: str) -> Optional[str]:
+    """Build the response cache key for a request, if it may be cached.
+    
+    Only temperature 0 requests are cached; sampled responses are meant to
+    vary between identical requests.
+    
+    Args:
+        llm_provider: Provider that would serve the request
+        system_prompt: Static system prompt sent with the request
+        prompt: Per-turn prompt, including the conversation history
+        
+    Returns:
+        SHA-256 hex digest of the request, or None if it is not cacheable
+    """
+    if not _response_cache.enabled or getattr(llm_provider, "temperature", None) != 0:
+        return None
+    request = json.dumps({
+        "provider": getattr(llm_provider, "provider", "unknown"),
+        "model": getattr(llm_provider, "model_name", "unknown"),
+        "system": system_prompt,
+        "prompt": prompt,
+        "temperature": 0
+    }, sort_keys=True)
+    return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+@dataclass(frozen=True, slots=True)
+class _ProviderRoute:
+    """A provider with its name, model and response handlers, resolved once."""
+    
+    provider: Any
+    name: str
+    model: str
+    nonstreaming_handler: Callable[..., AgentResult]
+    streaming_handler: Callable[..., Generator[bytes, None, str]]
 
 class TripAgent(BaseAgent):
     """Trip planning agent with tool capabilities.
@@ -18,6 +181,11 @@ class TripAgent(BaseAgent):
     time, city facts, and visit planning capabilities.
     """
     
+    __slots__ = (
+        "output_parser", "openai_handler", "_route", "_routes", "_providers",
+        "_providers_lock",
+    )
+    
     def __init__(self, llm_provider=None, output_parser=None):
         """
         Initialize the Trip Agent with LLM provider and specialized handlers.
@@ -33,15 +201,19 @@ class TripAgent(BaseAgent):
                           If None, creates default OutputParser instance
         
         Initialization Process:
-            1. Calls parent BaseAgent constructor with travel tools
+            1. Calls parent BaseAgent constructor with the shared travel tools,
+               bounding each session history at MEMORY_MAX_MESSAGES and the
+               number of sessions at MAX_SESSIONS
             2. Sets up output parser for response processing
             3. Creates OpenAI-specific streaming handler with logging
-            4. Generates system prompt for travel planning context
         
         Components Created:
             - output_parser: Handles token parsing and response formatting
             - openai_handler: Specialized handler for OpenAI streaming responses
-            - system_prompt: Travel-focused instructions for the LLM
+            - provider cache: One provider instance per provider name, filled
+              by get_provider and reused on every switch
+            - system_prompt: Travel-focused instructions for the LLM, built
+              lazily on first access and reused for every turn
         
         Available Tools:
             - weather_tool: Current weather information
@@ -54,10 +226,74 @@ class TripAgent(BaseAgent):
             - OpenAI handler enables terminal logging for debugging
             - Tools are automatically loaded from the tools module
         """
-        super().__init__(llm_provider, get_all_tools())
+        # Histories are born bounded, so old messages fall off on append and
+        # no per-turn trimming is needed
+        session_store = None
+        if Config.SESSION_REDIS_URL:
+            session_store = RedisSessionStore(
+                Config.SESSION_REDIS_URL, Config.SESSION_TTL, Config.MEMORY_MAX_MESSAGES
+            )
+        super().__init__(
+            llm_provider,
+            max_history=Config.MEMORY_MAX_MESSAGES,
+            max_sessions=Config.MAX_SESSIONS or None,
+            session_store=session_store
+        )
         self.output_parser = output_parser or OutputParser()
         self.openai_handler = OpenAIStreamingHandler(enable_terminal_logging=True)
-        self.system_prompt = self.create_system_prompt()
+        self._providers: Dict[str, "BaseLLMProvider"] = {}
+        self._providers_lock = threading.Lock()
+        # Provider name -> route, for per-request provider overrides
+        self._routes: Dict[str, _ProviderRoute] = {}
+    
+    @property
+    def current_provider_name(self) -> str:
+        """Name of the active provider, resolved when the provider was set."""
+        return self._route.name
+    
+    def get_provider(self, name: str) -> "BaseLLMProvider":
+        """
+        Get the provider instance for a provider name, creating it on first use.
+        
+        Providers are created from configuration and then reused, so
+        switching providers keeps each SDK client and its HTTP connection
+        pool instead of building new ones per request. Like the original
+        default provider, they are built without tools: prompts carry no
+        tool catalog and TOOL_CALL lines in responses are not executed.
+        
+        Args:
+            name (str): Provider name, e.g. "openai" or "google_gemini"
+        
+        Returns:
+            BaseLLMProvider: The cached provider instance
+        
+        Raises:
+            ValueError: If the provider is unsupported or has no API key configured
+        """
+        provider = self._providers.get(name)
+        if provider is None:
+            with self._providers_lock:
+                provider = self._providers.get(name)
+                if provider is None:
+                    # Imported here so the agent does not load every provider SDK
+                    from llm_factory import LLMFactory
+                    provider = LLMFactory.create_from_config(name, {})
+                    self._providers[name] = provider
+        return provider
+    
+    def warm_providers(self):
+        """
+        Create every configured provider ahead of the first request.
+        
+        Providers that fail to initialize, typically because their API key
+        is not set, are skipped and created (or reported) on first use.
+        """
+        from llm_factory import LLMFactory
+        for name in LLMFactory.get_available_providers():
+            try:
+                self.get_provider(name)
+            except Exception as e:
+                logger.debug("Skipping provider warm-up for %s: %s", name, e)
     
     def create_system_prompt(self) -> str:
         """
@@ -98,26 +334,7 @@ class TripAgent(BaseAgent):
             - Encourages practical, actionable advice
             - Maintains consistent helpful and friendly tone
         """
-        return f"""You are a helpful travel planning assistant. You have access to the following tools:
-
-1. **weather_tool(location)** - Get current weather information for any location
-2. **time_tool(timezone)** - Get current time, optionally for a specific timezone
-3. **city_facts_tool(city)** - Get interesting facts and information about cities
-4. **plan_city_visit_tool(city, days, interests)** - Create detailed travel plans for city visits
-
-When users ask about travel, weather, time, or city information, use the appropriate tools to provide accurate and helpful responses.
-
-Always be friendly, informative, and helpful. If you need to use a tool, clearly indicate what information you're looking up.
-
-For travel planning, consider factors like:
-- Weather conditions
-- Local time zones
-- Popular attractions and cultural sites
-- Local cuisine and dining recommendations
-- Transportation options
-- Best times to visit
-
-Provide practical, actionable advice that helps users plan amazing trips!"""
+        return _SYSTEM_PROMPT
     
     def create_thinking_prompt(self) -> str:
         """
@@ -152,18 +369,342 @@ Provide practical, actionable advice that helps users plan amazing trips!"""
             - Focuses on travel-specific considerations
             - Encourages proactive tool usage
         """
-        return """Before responding, think through your approach:
-
-<thinking>
-- What information does the user need?
-- Which tools should I use to get this information?
-- How can I provide the most helpful response?
-</thinking>
-
-Then provide your response."""
+        return _THINKING_PROMPT
+    
+    def _static_prompt(self) -> str:
+        """
+        Get the static system + thinking prompt sent ahead of every turn.
+        
+        Returns:
+            str: The precomputed prompt, unless the system prompt was overridden
+        """
+        system_prompt = self.system_prompt
+        if system_prompt is _SYSTEM_PROMPT:
+            return _STATIC_PROMPT
+        return f"{system_prompt}\n\n{_THINKING_PROMPT}"
+    
+    def _on_provider_change(self, provider):
+        """
+        Resolve provider name, model and response handlers for a new provider.
+        
+        Runs once whenever the provider is set or switched (including at
+        runtime via the LLM switch endpoint), so the per-message paths need
+        no attribute lookups or provider-name branching.
+        
+        Args:
+            provider: The new LLM provider instance, or None
+        """
+        self._route = self._make_route(provider)
+    
+    def _make_route(self, provider) -> _ProviderRoute:
+        """
+        Resolve the name, model and response handlers serving a provider.
+        
+        Args:
+            provider: LLM provider instance, or None
+        
+        Returns:
+            _ProviderRoute: The provider with its resolved attributes
+        """
+        name = getattr(provider, "provider", "unknown").lower()
+        if name == "openai":
+            nonstreaming_handler, streaming_handler = self._handle_openai_nonstream, self._handle_openai_stream
+        else:
+            nonstreaming_handler, streaming_handler = self._handle_generic_nonstream, self._handle_generic_stream
+        return _ProviderRoute(
+            provider, name, getattr(provider, "model_name", "unknown"),
+            nonstreaming_handler, streaming_handler
+        )
+    
+    def _resolve_route(self, provider: Optional[str]) -> _ProviderRoute:
+        """
+        Get the route serving one request.
+        
+        An override only applies to the request it is passed with; the
+        agent's active provider is left untouched, so concurrent requests
+        can use different providers without racing on shared state.
+        
+        Args:
+            provider (Optional[str]): Provider name overriding the active
+                                      provider for this request, or None
+        
+        Returns:
+            _ProviderRoute: Route of the override, or of the active provider
+        
+        Raises:
+            ValueError: If the override is unsupported or not configured
+        """
+        route = self._route
+        if provider is None or provider == route.name:
+            return route
+        route = self._routes.get(provider)
+        if route is None:
+            # Racing builds resolve the same cached provider, so either wins
+            route = self._routes.setdefault(provider, self._make_route(self.get_provider(provider)))
+        return route
+    
+    def _prepare_request(self, message: str, session_id: str, model: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Build the prompts for one LLM turn.
+        
+        Shared by process_message and stream_response so both send
+        byte-identical prompts for the same history and message.
+        
+        Args:
+            message (str): The user's message
+            session_id (str): Session identifier
+            model (Optional[str]): Model serving the turn, for the history token budget
+        
+        Returns:
+            Tuple[str, str]: The static system prompt and the per-turn prompt
+        """
+        # Get conversation history
+        conversation_context = self.format_conversation_history(
+            session_id, max_tokens=Config.MAX_HISTORY_TOKENS, model=model
+        )
+        
+        # Static instructions go first as the system prompt so providers
+        # can reuse their prefix cache; only the per-turn part varies
+        turn_prompt = _TURN_PROMPT_FRAME.format(history=conversation_context, message=message)
+        return self._static_prompt(), turn_prompt
+    
+    def _run_cached_plan(self, template: str, slots: Dict[str, Any]) -> str:
+        """
+        Execute a cached tool-call sequence and compose the reply.
+        
+        Args:
+            template (str): Plan-cache intent name
+            slots (Dict[str, Any]): Slot values extracted from the user message
+        
+        Returns:
+            str: The intent's introduction followed by one titled section per tool
+        """
+        calls = _PLAN_CACHE[template]
+        # The cached tools are independent, so run them concurrently
+        results = self.execute_tools([
+            (tool_name, {arg: slots[slot] for arg, slot in arguments.items()})
+            for tool_name, arguments, _ in calls
+        ])
+        sections = [_PLAN_REPLY_INTROS[template].format(**slots)]
+        for (_, _, heading), result in zip(calls, results):
+            sections.append(f"**{heading.format(**slots)}**\n{result.strip()}")
+        return "\n\n".join(sections)
+    
+    def _error_result(self, route: _ProviderRoute, session_id: str, error: str,
+                      response: Optional[str] = None, rate_limited: bool = False) -> AgentResult:
+        """
+        Build the failed result returned to the caller.
+        
+        Args:
+            route (_ProviderRoute): Provider that served the request
+            session_id (str): Session identifier
+            error (str): Error details
+            response (Optional[str]): User-facing message; defaults to a
+                                      generic message quoting the error
+            rate_limited (bool): Whether the provider rejected the request
+                                 because of rate limiting
+        
+        Returns:
+            AgentResult: Result with success=False
+        """
+        if response is None:
+            response = f"I encountered an error while processing your request: {error}"
+        return AgentResult(
+            response=response,
+            success=False,
+            provider=route.name,
+            model=route.model,
+            session_id=session_id,
+            error=error,
+            rate_limited=rate_limited
+        )
+    
+    def _handle_openai_nonstream(self, response: Any, session_id: str, route: _ProviderRoute) -> AgentResult:
+        """
+        Standardize a complete OpenAI response through the OpenAI handler.
+        
+        Args:
+            response (Any): Provider response; an OpenAI completion, a
+                            provider result dict or plain text
+            session_id (str): Session identifier
+            route (_ProviderRoute): Provider that produced the response
+        
+        Returns:
+            AgentResult: Standardized result from the OpenAI handler
+        """
+        logger.debug("Using OpenAI-specific non-streaming handler for session %s", session_id)
+        
+        if isinstance(response, dict) and "choices" in response:
+            # Response is already in OpenAI format
+            openai_response = response
+        else:
+            if isinstance(response, dict):
+                # Provider result dict, unwrap the generated text
+                response = response.get("response", "")
+            
+            # Response is a string, convert to OpenAI format
+            openai_response = {
+                "choices": [{
+                    "message": {
+                        "content": response
+                    },
+                    "finish_reason": "stop"
+                }],
+                "model": route.model,
+                "object": "chat.completion",
+                "created": int(time.time())
+            }
+        
+        # Handlers keep parser state, so each request gets its own
+        handler = OpenAIStreamingHandler(self.openai_handler.enable_logging)
+        result = handler.process_openai_non_streaming_response(openai_response, session_id)
+        return AgentResult(
+            response=result["response"],
+            success=result["success"],
+            provider=result["provider"],
+            model=result["model"],
+            session_id=session_id,
+            error=result.get("error")
+        )
+    
+    def _handle_generic_nonstream(self, response: Any, session_id: str, route: _ProviderRoute) -> AgentResult:
+        """
+        Standardize a complete response through the standard OutputParser.
+        
+        Args:
+            response (Any): Provider response, either a provider result dict
+                            or plain text
+            session_id (str): Session identifier
+            route (_ProviderRoute): Provider that produced the response
+        
+        Returns:
+            AgentResult: Standardized result
+        """
+        logger.debug("Using standard non-streaming handler for provider: %s", route.name)
+        
+        if isinstance(response, dict):
+            # Provider result dict, unwrap the generated text
+            response = response.get("response", "")
+        
+        clean_response = self.output_parser.clean_full_response(response)
+        
+        return AgentResult(
+            response=clean_response,
+            success=True,
+            provider=route.name,
+            model=route.model,
+            session_id=session_id
+        )
+    
+    def _guard_tool_calls(self, token_stream) -> Generator[str, None, None]:
+        """
+        Pass tokens through, cutting the stream at a call to an unknown tool.
+        
+        Args:
+            token_stream: Raw token stream from the provider
+        
+        Yields:
+            str: Tokens up to the first call to an unregistered tool, then a
+                 short notice in place of the rest of the response
+        
+        Note:
+            - Closing the provider generator ends the upstream request, so
+              no further tokens are generated or billed
+        """
+        validator = StreamingToolValidator(self.tool_registry)
+        for chunk in token_stream:
+            unknown_tool = validator.push(chunk)
+            if unknown_tool is not None:
+                logger.warning("Stopping stream: model called unknown tool %s", unknown_tool)
+                close = getattr(token_stream, "close", None)
+                if close is not None:
+                    close()
+                yield f"\n\nI tried to use a tool that doesn't exist ({unknown_tool}), so I stopped this response. Please try rephrasing your request."
+                return
+            yield chunk
+    
+    def _handle_openai_stream(self, token_stream, session_id: str, route: _ProviderRoute) -> Generator[bytes, None, str]:
+        """
+        Stream OpenAI tokens as SSE frames through the OpenAI handler.
+        
+        Args:
+            token_stream: Raw token stream from the provider
+            session_id (str): Session identifier
+            route (_ProviderRoute): Provider producing the stream
+        
+        Yields:
+            bytes: UTF-8 encoded SSE frames
+        
+        Returns:
+            str: Clean final response, for conversation history
+        """
+        logger.debug("Using OpenAI-specific streaming handler for session %s", session_id)
+        
+        # Handlers keep parser state, so each stream gets its own
+        handler = OpenAIStreamingHandler(self.openai_handler.enable_logging)
+        
+        # Frames are serialized once, straight to bytes
+        yield from handler.stream_openai_sse_bytes(token_stream, session_id)
+        
+        # Get final response from OpenAI handler
+        response_summary = handler.get_openai_response_summary()
+        return response_summary.get("final_response", "")
+    
+    def _handle_generic_stream(self, token_stream, session_id: str, route: _ProviderRoute) -> Generator[bytes, None, str]:
+        """
+        Stream tokens as SSE frames through the standard OutputParser.
+        
+        Args:
+            token_stream: Raw token stream from the provider
+            session_id (str): Session identifier
+            route (_ProviderRoute): Provider producing the stream
+        
+        Yields:
+            bytes: UTF-8 encoded SSE frames
+        
+        Returns:
+            str: Clean final response, for conversation history
+        """
+        logger.debug("Using standard streaming handler for provider: %s", route.name)
+        
+        # parse_stream keeps its state on the parser, so concurrent streams
+        # each parse with a shallow copy of the shared, configured parser
+        parser = copy.copy(self.output_parser)
+        # Runs of content tokens go out as one frame per chunk of text
+        parsed_stream = batch_tokens(
+            parser.parse_stream(token_stream),
+            Config.STREAM_BATCH_CHARS,
+            Config.STREAM_BATCH_INTERVAL
+        )
+        
+        # Pace content tokens to at most one per STREAMING_DELAY. Time
+        # spent waiting on the provider counts toward the delay, so
+        # tokens are only held back when upstream outpaces the target.
+        streaming_delay = Config.STREAMING_DELAY
+        next_emit = 0.0
+        
+        # Bound once; the loop body runs for every streamed token
+        format_sse = parser.format_for_sse_bytes
+        monotonic = time.monotonic
+        
+        # Stream parsed tokens with proper formatting
+        for parsed_token in parsed_stream:
+            # Control tokens are never delayed
+            if streaming_delay > 0 and parsed_token.token_type not in _CONTROL_TOKEN_TYPES:
+                wait = next_emit - monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                next_emit = monotonic() + streaming_delay
+            
+            # Format for Server-Sent Events, already encoded for the socket
+            yield format_sse(parsed_token)
+        
+        # Extract final response using the standard parser
+        return parser.extract_final_response()
     
     @traceable(name="trip_agent_query")
-    def process_message(self, message: str, session_id: str = "default") -> Dict[str, Any]:
+    def process_message(self, message: str, session_id: str = "default",
+                        provider: Optional[str] = None) -> Dict[str, Any]:
         """
         Process a user message and return a complete response with provider-specific handling.
         
@@ -176,6 +717,8 @@ Then provide your response."""
             message (str): The user's travel-related question or request
             session_id (str): Unique identifier for the conversation session
                              Used for conversation history and memory management
+            provider (Optional[str]): Provider serving this request only, e.g.
+                                      "groq"; defaults to the active provider
         
         Returns:
             Dict[str, Any]: Standardized response dictionary containing:
@@ -185,15 +728,21 @@ Then provide your response."""
                 - model (str): Specific model name used
                 - session_id (str): Session identifier
                 - error (str, optional): Error details if success=False
+                - rate_limited (bool): Whether the provider rate limited the request
         
         Processing Flow:
-            1. Memory Optimization: Clears old conversation data if needed
-            2. Context Preparation: Formats conversation history
-            3. Prompt Construction: Combines system prompt, thinking prompt, and context
-            4. LLM Response: Gets response from configured provider
-            5. Provider-Specific Processing: Uses specialized handlers
-            6. History Management: Adds messages to conversation history
-            7. Response Validation: Ensures proper response structure
+            1. Plan Cache: When PLAN_CACHE_ENABLED, known plan intents such as
+               "plan 3 days in Paris" are answered from their cached tool
+               sequence, skipping the remaining steps except history management
+            2. Request Preparation (_prepare_request, shared with stream_response):
+               - Context Preparation: Formats conversation history
+               - Prompt Construction: Static system + thinking prompt sent
+                 separately ahead of the per-turn history and message
+            3. LLM Response: Gets response from configured provider, or from the
+               exact-match response cache for repeated temperature 0 requests, or
+               (when enabled) from the semantic cache for paraphrased first turns
+            4. Provider-Specific Processing: Uses specialized handlers
+            5. History Management: Adds messages to conversation history
         
         Provider-Specific Handling:
             - OpenAI: Uses OpenAIStreamingHandler for specialized processing
@@ -205,104 +754,119 @@ Then provide your response."""
             - Provides user-friendly error messages
         
         Note:
-            - Decorated with @traceable for LangSmith monitoring
+            - Decorated with @traceable for LangSmith monitoring (a no-op
+              unless LANGSMITH_TRACING is enabled)
             - Automatically manages conversation history
-            - Optimizes memory usage for long conversations
+            - Session histories keep at most MEMORY_MAX_MESSAGES messages
+            - Internal steps pass an AgentResult, serialized to a dict only here
         """
+        return self._process_message(message, session_id, provider).to_dict()
+    
+    def _process_message(self, message: str, session_id: str, provider: Optional[str] = None) -> AgentResult:
+        """
+        Run the processing flow described in process_message.
+        
+        Args:
+            message (str): The user's travel-related question or request
+            session_id (str): Unique identifier for the conversation session
+            provider (Optional[str]): Provider override for this request, or None
+        
+        Returns:
+            AgentResult: Result of the turn, including errors
+        """
+        route = self._route
         try:
-            # Optimize memory before processing
-            self.optimize_memory(session_id)
+            route = self._resolve_route(provider)
             
-            # Get conversation history
-            conversation_context = self.format_conversation_history(session_id)
+            # Known plan intents are answered straight from their cached tool
+            # sequence, skipping the LLM turn
+            if Config.PLAN_CACHE_ENABLED:
+                intent = _match_plan_intent(message)
+                if intent is not None:
+                    template, slots = intent
+                    plan_response = self._run_cached_plan(template, slots)
+                    self.add_to_history(session_id, "user", message)
+                    self.add_to_history(session_id, "assistant", plan_response)
+                    return AgentResult(
+                        response=plan_response,
+                        success=True,
+                        provider=route.name,
+                        model=route.model,
+                        session_id=session_id
+                    )
             
-            # Prepare the full prompt
-            full_prompt = f"""{self.system_prompt}
-
-{self.create_thinking_prompt()}
-
-Conversation History:
-{conversation_context}
-
-User: {message}"""
+            system_prompt, turn_prompt = self._prepare_request(message, session_id, route.model)
             
-            # Get response from LLM provider
-            response = self.llm_provider.generate_response(full_prompt, max_tokens=2048)
+            # Exact repeats of a deterministic request skip the LLM call
+            response_key = _response_cache_key(route.provider, system_prompt, turn_prompt)
+            response = None
+            if response_key is not None:
+                response = _response_cache.get(response_key)
             
-            # Check if this is an OpenAI provider and use specialized handler
-            provider_name = getattr(self.llm_provider, "provider", "unknown").lower()
+            # Paraphrases of an earlier opening question reuse its answer.
+            # Only first turns qualify: later turns depend on the history.
+            semantic_namespace = semantic_embedding = None
+            if (response is None and _semantic_cache is not None
+                    and not self.get_session_history(session_id)
+                    and _semantic_cache.is_cacheable(message)):
+                semantic_namespace = f"{route.name}:{route.model}"
+                semantic_embedding = _semantic_cache.embed(message)
+                cached_result = _semantic_cache.lookup(semantic_namespace, semantic_embedding)
+                if cached_result is not None:
+                    result = replace(cached_result, session_id=session_id)
+                    self.add_to_history(session_id, "user", message)
+                    self.add_to_history(session_id, "assistant", result.response)
+                    return result
             
-            if provider_name == "openai":
-                # Use OpenAI-specific non-streaming handler
-                print(f"🔄 Using OpenAI-specific non-streaming handler for session {session_id}")
-                
-                # Process through OpenAI handler
-                if isinstance(response, dict):
-                    # Response is already in OpenAI format
-                    standardized_result = self.openai_handler.process_openai_non_streaming_response(response, session_id)
-                else:
-                    # Response is a string, convert to OpenAI format
-                    openai_response = {
-                        "choices": [{
-                            "message": {
-                                "content": response
-                            },
-                            "finish_reason": "stop"
-                        }],
-                        "model": getattr(self.llm_provider, "model_name", "unknown"),
-                        "object": "chat.completion",
-                        "created": int(time.time())
-                    }
-                    standardized_result = self.openai_handler.process_openai_non_streaming_response(openai_response, session_id)
-                
-                clean_response = standardized_result.get("response", "")
-                
-            else:
-                # Use standard OutputParser for other providers
-                print(f"🔄 Using standard non-streaming handler for provider: {provider_name}")
-                
-                # Process response through output parser
-                self.output_parser.accumulated_response = response
-                clean_response = self.output_parser.extract_final_response()
-                
-                # Create standardized result
-                standardized_result = {
-                    "response": clean_response,
-                    "success": True,
-                    "provider": getattr(self.llm_provider, "provider", "unknown"),
-                    "model": getattr(self.llm_provider, "model_name", "unknown"),
-                    "session_id": session_id
-                }
+            if response is None:
+                # Get response from LLM provider
+                response = route.provider.generate_response(
+                    turn_prompt,
+                    max_tokens=2048,
+                    system_prompt=system_prompt,
+                    cache_key=session_id
+                )
+                if response_key is not None and isinstance(response, dict) and response.get("success"):
+                    _response_cache.set(response_key, response)
+            
+            # Provider-reported failures (API errors, rate limits) are passed
+            # through without touching the history
+            if isinstance(response, dict) and not response.get("success", True):
+                error = response.get("response", "Unknown error occurred")
+                return self._error_result(
+                    route, session_id, error, response=error,
+                    rate_limited=bool(response.get("rate_limited", False))
+                )
+            
+            # Provider-specific processing, resolved when the provider was set
+            result = route.nonstreaming_handler(response, session_id, route)
+            
+            if semantic_embedding is not None and result.success:
+                _semantic_cache.insert(semantic_namespace, semantic_embedding, result)
             
             # Add to conversation history
             self.add_to_history(session_id, "user", message)
-            self.add_to_history(session_id, "assistant", clean_response)
+            self.add_to_history(session_id, "assistant", result.response)
             
-            return self.output_parser.validate_response_structure(standardized_result)
+            return result
             
         except Exception as e:
-            print(f"Error in query processing: {e}")
-            error_response = {
-                "response": f"I encountered an error while processing your request: {str(e)}",
-                "success": False,
-                "provider": getattr(self.llm_provider, "provider", "unknown"),
-                "model": getattr(self.llm_provider, "model_name", "unknown"),
-                "error": str(e),
-                "session_id": session_id
-            }
-            return self.output_parser.validate_response_structure(error_response)
+            logger.error("Error in query processing: %s", e)
+            return self._error_result(route, session_id, str(e))
     
     @traceable(name="trip_agent_stream")
-    def stream_response(self, message: str, session_id: str = "default") -> Generator[str, None, None]:
+    def stream_response(self, message: str, session_id: str = "default",
+                        provider: Optional[str] = None) -> Generator[bytes, None, None]:
         """Stream response from the agent with provider-specific handling.
         
         This method provides real-time streaming of AI responses with different handling
-        strategies based on the LLM provider. It optimizes memory usage, formats conversation
-        context, and routes to appropriate streaming handlers for different providers.
+        strategies based on the LLM provider. It formats conversation context
+        and routes to appropriate streaming handlers for different providers.
         
         Processing Flow:
-        1. Optimizes memory and formats conversation history
-        2. Constructs full prompt with system instructions and thinking prompts
+        1. Formats conversation history
+        2. Sends system instructions and thinking prompt as a static system prompt,
+           separate from the per-turn history and message
         3. Obtains token stream from the LLM provider
         4. Routes to provider-specific streaming handler:
            - OpenAI: Uses specialized OpenAI streaming handler with compatibility layer
@@ -322,267 +886,51 @@ User: {message}"""
             message (str): The user message to process and respond to
             session_id (str, optional): Session identifier for conversation tracking.
                                       Defaults to "default"
+            provider (str, optional): Provider serving this request only, e.g.
+                                    "groq"; defaults to the active provider
             
         Yields:
-            str: Streaming response chunks in Server-Sent Events (SSE) format.
-                Each chunk contains JSON data with token and type information
+            bytes: UTF-8 encoded Server-Sent Events (SSE) frames, written to the
+                response as-is. Each frame contains JSON data with token and
+                type information
                 
         Notes:
-        - Applies streaming delays between tokens for better UX (except control tokens)
+        - Stops the upstream stream as soon as the model calls an unknown tool
+        - Outside OpenAI streams, merges runs of content tokens into frames of up
+          to STREAM_BATCH_CHARS characters
+        - When STREAMING_DELAY is set, paces content tokens to at most one per delay;
+          control tokens and slow upstreams are never held back
+        - Errors are sent as a single error frame followed by the complete frame
         - Stores only final response in conversation history, not thinking process
         - Uses different parsers based on provider capabilities
         - Maintains session-based conversation context
         """
         try:
-            # Optimize memory before processing
-            self.optimize_memory(session_id)
-            
-            # Get conversation history
-            conversation_context = self.format_conversation_history(session_id)
-            
-            # Prepare the full prompt with context and thinking instructions
-            full_prompt = f"""{self.system_prompt}
-
-{self.create_thinking_prompt()}
-
-Conversation History:
-{conversation_context}
-
-User: {message}"""
+            route = self._resolve_route(provider)
+            system_prompt, turn_prompt = self._prepare_request(message, session_id, route.model)
             
             # Get token stream from LLM provider
-            token_stream = self.llm_provider.stream_response(full_prompt, max_tokens=2048)
+            token_stream = route.provider.stream_response(
+                turn_prompt,
+                max_tokens=2048,
+                system_prompt=system_prompt,
+                cache_key=session_id
+            )
             
-            # Check if this is an OpenAI provider and use specialized handler
-            provider_name = getattr(self.llm_provider, "provider", "unknown").lower()
+            # Stop early if the model calls a tool that does not exist
+            token_stream = self._guard_tool_calls(token_stream)
             
-            if provider_name == "openai":
-                # Use OpenAI-specific streaming handler
-                print(f"🔄 Using OpenAI-specific streaming handler for session {session_id}")
-                
-                # Process through OpenAI handler and convert to compatibility format
-                openai_stream = self.openai_handler.create_compatibility_stream(token_stream, session_id)
-                
-                for sse_data in openai_stream:
-                    yield sse_data
-                
-                # Get final response from OpenAI handler
-                response_summary = self.openai_handler.get_openai_response_summary()
-                final_response_clean = response_summary.get("final_response", "")
-                
-            else:
-                # Use standard OutputParser for other providers
-                print(f"🔄 Using standard streaming handler for provider: {provider_name}")
-                
-                # Use OutputParser to standardize the response processing
-                parsed_stream = self.output_parser.parse_stream(token_stream)
-                
-                # Stream parsed tokens with proper formatting
-                for parsed_token in parsed_stream:
-                    # Format for Server-Sent Events
-                    sse_data = self.output_parser.format_for_sse(parsed_token)
-                    yield sse_data
-                    
-                    # Add streaming delay except for control tokens
-                    if parsed_token.token_type not in [
-                        TokenType.THINKING_START, TokenType.THINKING_END, 
-                        TokenType.TOOL_CALL_START, TokenType.TOOL_CALL_END,
-                        TokenType.TOOL_RESULT_START, TokenType.TOOL_RESULT_END,
-                        TokenType.COMPLETE
-                    ]:
-                        time.sleep(Config.STREAMING_DELAY)
-                
-                # Extract final response using the standard parser
-                final_response_clean = self.output_parser.extract_final_response()
+            # Provider-specific streaming, resolved when the provider was set;
+            # the handler returns the clean final response once exhausted
+            final_response_clean = yield from route.streaming_handler(token_stream, session_id, route)
             
             # Add to conversation history (store only the final response, not thinking)
             self.add_to_history(session_id, "user", message)
             self.add_to_history(session_id, "assistant", final_response_clean)
             
         except Exception as e:
-            print(f"Error in streaming: {e}")
-            # Use parser to handle error formatting
+            logger.error("Error in streaming: %s", e)
+            # Send the whole error in one frame
             error_msg = f"I encountered an error while processing your request: {str(e)}"
-            for char in error_msg:
-                yield f"data: {json.dumps({'token': char, 'type': 'error'})}\n\n"
-                time.sleep(Config.STREAMING_DELAY)
-            yield f"data: {json.dumps({'token': '', 'type': 'complete'})}\n\n"
-    
-    # LangGraph-specific methods
-    def create_graph_nodes(self) -> Dict[str, Any]:
-        """Create node definitions for LangGraph integration.
-        
-        This method defines the computational nodes that can be used in a LangGraph
-        workflow for more complex, graph-based AI agent orchestration. Each node
-        represents a specific stage in the agent's processing pipeline.
-        
-        Node Definitions:
-        - process_input: Handles initial input processing and validation
-        - think: Manages the thinking/reasoning phase of the agent
-        - use_tool: Executes tool calls and external integrations
-        - generate_response: Handles response generation from the LLM
-        - format_output: Formats and structures the final output
-        
-        Returns:
-            Dict[str, Any]: Dictionary mapping node names to their corresponding
-                          method references for LangGraph execution
-                          
-        Notes:
-        - Currently provides placeholder implementations for future LangGraph integration
-        - Enables modular, graph-based agent workflow design
-        - Supports complex multi-step reasoning and tool usage patterns
-        """
-        return {
-            "process_input": self._process_input_node,
-            "think": self._thinking_node,
-            "use_tool": self._tool_execution_node,
-            "generate_response": self._response_generation_node,
-            "format_output": self._output_formatting_node
-        }
-    
-    def _process_input_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        """Process input node for LangGraph workflow.
-        
-        This node handles the initial processing of user input within a LangGraph
-        workflow. It would typically validate input, extract relevant information,
-        and prepare the state for subsequent processing nodes.
-        
-        Typical Processing:
-        - Input validation and sanitization
-        - Context extraction and preparation
-        - State initialization for downstream nodes
-        - Session management and tracking
-        
-        Args:
-            state (Dict[str, Any]): Current graph state containing input data,
-                                  session information, and workflow context
-            
-        Returns:
-            Dict[str, Any]: Updated state with processed input and prepared context
-                          for subsequent nodes in the workflow
-                          
-        Notes:
-        - Currently a placeholder for future LangGraph integration
-        - Would implement input preprocessing logic when LangGraph is integrated
-        - Maintains state consistency across the workflow
-        """
-        # This would be implemented when integrating with LangGraph
-        # For now, it's a placeholder that maintains compatibility
-        return state
-    
-    def _thinking_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        """Thinking node for LangGraph workflow.
-        
-        This node manages the reasoning and thinking phase of the agent within
-        a LangGraph workflow. It would handle complex reasoning, planning, and
-        decision-making processes before generating responses.
-        
-        Typical Processing:
-        - Analyzes the current context and user request
-        - Performs reasoning and planning steps
-        - Determines appropriate response strategies
-        - Evaluates need for tool usage or additional information
-        
-        Args:
-            state (Dict[str, Any]): Current graph state containing processed input,
-                                  context, and any previous reasoning results
-            
-        Returns:
-            Dict[str, Any]: Updated state with reasoning results, plans, and
-                          decisions for subsequent processing nodes
-                          
-        Notes:
-        - Currently a placeholder for future LangGraph integration
-        - Would implement sophisticated reasoning logic when LangGraph is integrated
-        - Enables complex multi-step thinking processes
-        """
-        # This would be implemented when integrating with LangGraph
-        return state
-    
-    def _tool_execution_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        """Tool execution node for LangGraph workflow.
-        
-        This node handles the execution of external tools and integrations within
-        a LangGraph workflow. It would manage tool calls, API integrations, and
-        external service interactions based on the agent's reasoning.
-        
-        Typical Processing:
-        - Identifies required tools based on reasoning results
-        - Executes tool calls with appropriate parameters
-        - Handles tool responses and error conditions
-        - Integrates tool results back into the workflow state
-        
-        Args:
-            state (Dict[str, Any]): Current graph state containing reasoning results,
-                                  tool requirements, and execution context
-            
-        Returns:
-            Dict[str, Any]: Updated state with tool execution results and
-                          integrated external data for response generation
-                          
-        Notes:
-        - Currently a placeholder for future LangGraph integration
-        - Would implement tool orchestration logic when LangGraph is integrated
-        - Supports complex tool chaining and error handling
-        """
-        # This would be implemented when integrating with LangGraph
-        return state
-    
-    def _response_generation_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        """Response generation node for LangGraph workflow.
-        
-        This node handles the generation of the final response within a LangGraph
-        workflow. It would use the LLM provider to generate responses based on
-        all previous processing, reasoning, and tool execution results.
-        
-        Typical Processing:
-        - Constructs final prompt from all workflow context
-        - Calls the LLM provider for response generation
-        - Handles streaming or non-streaming response modes
-        - Manages provider-specific response processing
-        
-        Args:
-            state (Dict[str, Any]): Current graph state containing all processed
-                                  context, reasoning, and tool results
-            
-        Returns:
-            Dict[str, Any]: Updated state with generated response and
-                          completion metadata for final formatting
-                          
-        Notes:
-        - Currently a placeholder for future LangGraph integration
-        - Would implement LLM integration logic when LangGraph is integrated
-        - Supports both streaming and non-streaming response generation
-        """
-        # This would be implemented when integrating with LangGraph
-        return state
-    
-    def _output_formatting_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        """Output formatting node for LangGraph workflow.
-        
-        This node handles the final formatting and structuring of the agent's
-        response within a LangGraph workflow. It would ensure consistent output
-        format, apply any necessary post-processing, and prepare the final result.
-        
-        Typical Processing:
-        - Formats the generated response for consistency
-        - Applies output validation and quality checks
-        - Structures response metadata and session information
-        - Prepares final result for client consumption
-        
-        Args:
-            state (Dict[str, Any]): Current graph state containing generated response
-                                  and all workflow context and metadata
-            
-        Returns:
-            Dict[str, Any]: Updated state with formatted final response and
-                          completion status for workflow conclusion
-                          
-        Notes:
-        - Currently a placeholder for future LangGraph integration
-        - Would implement output formatting logic when LangGraph is integrated
-        - Ensures consistent response structure and quality
-            Updated state
-        """
-        # This would be implemented when integrating with LangGraph
-        return state
\ No newline at end of file
+            yield b"data: " + dumps_json_bytes({'token': error_msg, 'type': 'error'}) + b"\n\n"
+            yield _SSE_COMPLETE
@@ -1,16 +1,16 @@
+import functools
 import os
 import json
-from flask import Flask, request, Response, jsonify
+from flask import Flask, request, Response, jsonify, make_response
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from flask_restx import Api, Resource, fields, Namespace
+import random
 import time
 import threading
-from typing import Any, Optional
-# Standard LangSmith imports for tracing
-from langsmith import traceable
+from typing import Any, Dict, Optional
 from config import get_config
-from llm_factory import LLMFactory, BaseLLMProvider
-from output_parser import OutputParser, TokenType
+from output_parser import OutputParser, TokenType, dumps_json_bytes, orjson
 from agents import TripAgent
 
 # Get configuration
@@ -40,6 +40,38 @@ config.print_config()
 
 app = Flask(__name__)
 CORS(app, origins=config.CORS_ORIGINS)
+# Swagger mask fields are unused; skip documenting them on every operation
+app.config['RESTX_MASK_SWAGGER'] = False
+
+if orjson is not None:
+    class ORJSONProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson, used by jsonify and get_json."""
+        
+        def dumps(self, obj: Any, **kwargs: Any) -> str:
+            return dumps_json_bytes(obj).decode("utf-8")
+        
+        def loads(self, s, **kwargs: Any) -> Any:
+            return orjson.loads(s)
+    
+    app.json = ORJSONProvider(app)
+
+# On-demand profiling of a sample of requests, for diagnosis in place
+if config.FLASK_PROFILE:
+    from werkzeug.middleware.profiler import ProfilerMiddleware
+    
+    os.makedirs(config.FLASK_PROFILE_DIR, exist_ok=True)
+    _unprofiled_wsgi_app = app.wsgi_app
+    _profiled_wsgi_app = ProfilerMiddleware(
+        app.wsgi_app, profile_dir=config.FLASK_PROFILE_DIR, restrictions=[30]
+    )
+    
+    def _sampled_wsgi_app(environ, start_response):
+        """Route a FLASK_PROFILE_SAMPLE_RATE fraction of requests through the profiler."""
+        if random.random() < config.FLASK_PROFILE_SAMPLE_RATE:
+            return _profiled_wsgi_app(environ, start_response)
+        return _unprofiled_wsgi_app(environ, start_response)
+    
+    app.wsgi_app = _sampled_wsgi_app
 
 # Initialize Flask-RESTX API
 api = Api(
@@ -51,6 +83,14 @@ api = Api(
     prefix='/api/v1'
 )
 
+@api.representation('application/json')
+def output_json(data, code, headers=None):
+    """Serialize Flask-RESTX resource results, with orjson when installed."""
+    response = make_response(dumps_json_bytes(data) + b"\n", code)
+    response.headers.extend(headers or {})
+    response.mimetype = 'application/json'
+    return response
+
 # Create namespaces
 chat_ns = Namespace('chat', description='Chat operations')
 memory_ns = Namespace('memory', description='Memory management operations')
@@ -79,6 +119,19 @@ chat_response = api.model('ChatResponse', {
     'rate_limited': fields.Boolean(description='Whether the response was rate limited')
 })
 
+chat_batch_item = api.model('ChatBatchItem', {
+    'message': fields.String(required=True, description='The user message'),
+    'session_id': fields.String(required=False, default='default', description='Session identifier')
+})
+
+chat_batch_request = api.model('ChatBatchRequest', {
+    'items': fields.List(fields.Nested(chat_batch_item), required=True, description='Messages to process')
+})
+
+chat_batch_response = api.model('ChatBatchResponse', {
+    'results': fields.List(fields.Nested(chat_response), description='Responses in the same order as the items')
+})
+
 memory_status_response = api.model('MemoryStatusResponse', {
     'session_id': fields.String(description='Session identifier'),
     'message_count': fields.Integer(description='Number of messages in session'),
@@ -107,19 +160,110 @@ error_response = api.model('ErrorResponse', {
 
 # Session management is now handled by the agent
 
-# Initialize the agent
-output_parser = OutputParser(enable_terminal_logging=True)
-llm_provider = LLMFactory.create_from_config(config.DEFAULT_LLM_PROVIDER, [])
-agent = TripAgent(llm_provider, output_parser)
+# Health check body, serialized once; probes hit it far more often than any other route
+_HEALTH_BODY = json.dumps({"status": "healthy", "message": "Trip Advisor - AI Agent API is running"}).encode("utf-8")
+
+# Headers shared by every streaming response; Werkzeug copies them per response
+_SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'Connection': 'keep-alive',
+    'X-Accel-Buffering': 'no',
+    'Access-Control-Allow-Origin': '*'
+}
+
+# The agent and its provider clients are built on first use rather than at
+# import, so importing the app (WSGI servers, tooling) stays cheap
+_agent: Optional[TripAgent] = None
+_agent_lock = threading.Lock()
+
+def get_agent() -> TripAgent:
+    """Return the shared agent, creating it and warming its providers on first use."""
+    global _agent
+    if _agent is None:
+        with _agent_lock:
+            if _agent is None:
+                agent = TripAgent(output_parser=OutputParser(enable_terminal_logging=True))
+                agent.llm_provider = agent.get_provider(config.DEFAULT_LLM_PROVIDER)
+                agent.warm_providers()
+                _agent = agent
+    return _agent
+
+# Provider name -> (display name, config attribute holding its API key)
+_PROVIDER_API_KEYS = {
+    "google_gemini": ("Google Gemini", "GOOGLE_API_KEY"),
+    "openai": ("OpenAI", "OPENAI_API_KEY"),
+    "groq": ("Groq", "GROQ_API_KEY"),
+    "perplexity": ("Perplexity", "PERPLEXITY_API_KEY")
+}
+
+@functools.lru_cache(maxsize=1)
+def _provider_catalog() -> Dict[str, Any]:
+    """Available providers and which are configured, fixed for the process lifetime."""
+    from llm_factory import LLMFactory
+    
+    return {
+        "available_providers": LLMFactory.get_available_providers(),
+        "configured_providers": {
+            name: getattr(config, key_attr) is not None
+            for name, (_, key_attr) in _PROVIDER_API_KEYS.items()
+        }
+    }
+
+def _handle_chat(data: Dict[str, Any], stream: bool):
+    """
+    Serve a chat request; shared by every chat route.
+    
+    Args:
+        data (Dict[str, Any]): Request JSON with message, optional session_id
+                               and optional per-request provider override
+        stream (bool): Whether to stream the reply as Server-Sent Events
+    
+    Returns:
+        A streaming Response, or a (body, status code) pair
+    """
+    agent = get_agent()
+    message = data.get('message', '')
+    session_id = data.get('session_id', 'default')
+    provider = data.get('provider')  # Optional provider override
+    
+    if not message:
+        return {"error": "Message is required"}, 400
+    
+    # The provider override applies to this request only; resolve it
+    # up front so an unknown or unconfigured provider fails early
+    if provider:
+        try:
+            agent.get_provider(provider)
+        except Exception as e:
+            return {"error": f"Failed to use {provider}: {str(e)}"}, 500
+    
+    if stream:
+        # Returned as a raw Response, which Flask-RESTX passes through
+        # unmarshalled; frames are already bytes, so Werkzeug does too
+        return Response(
+            agent.stream_response(message, session_id, provider),
+            mimetype='text/event-stream',
+            direct_passthrough=True,
+            headers=_SSE_HEADERS
+        )
+    return agent.process_message(message, session_id, provider), 200
+
+def _plain_response(result):
+    """Turn a _handle_chat result into a response for a plain Flask route."""
+    if isinstance(result, Response):
+        return result
+    body, status = result
+    return jsonify(body), status
 
 # Health check endpoint
 @health_ns.route('')
 class HealthCheck(Resource):
     @health_ns.doc('health_check')
-    @health_ns.marshal_with(health_response)
+    @health_ns.response(200, 'Success', health_response)
     def get(self):
         """Health check endpoint"""
-        return {"status": "healthy", "message": "Trip Advisor - AI Agent API is running"}
+        # Raw response skips marshalling; the model above still documents it
+        return Response(_HEALTH_BODY, mimetype='application/json')
 
 # Chat endpoint
 @chat_ns.route('')
@@ -133,40 +277,38 @@ class Chat(Resource):
         """Main chat endpoint with optional streaming"""
         try:
             data = request.get_json()
-            message = data.get('message', '')
-            session_id = data.get('session_id', 'default')
-            provider = data.get('provider')  # Optional provider override
-            stream = data.get('stream', True)  # Default to streaming
+            # Default to streaming
+            return _handle_chat(data, data.get('stream', True))
+        
+        except Exception as e:
+            return {"error": str(e)}, 500
+
+# Batch chat endpoint
+@chat_ns.route('/batch')
+class ChatBatch(Resource):
+    @chat_ns.doc('chat_batch')
+    @chat_ns.expect(chat_batch_request)
+    @chat_ns.response(200, 'Success', chat_batch_response)
+    @chat_ns.response(400, 'Bad Request', error_response)
+    @chat_ns.response(500, 'Internal Server Error', error_response)
+    def post(self):
+        """Process several messages concurrently with the current provider"""
+        try:
+            agent = get_agent()
+            data = request.get_json()
+            items = data.get('items') or []
             
-            if not message:
-                return {"error": "Message is required"}, 400
+            if not items:
+                return {"error": "At least one item is required"}, 400
+            if len(items) > config.CHAT_BATCH_MAX_ITEMS:
+                return {"error": f"At most {config.CHAT_BATCH_MAX_ITEMS} items are allowed per batch"}, 400
             
-            # Switch provider if specified
-            if provider and provider != getattr(agent.llm_provider, "provider", config.DEFAULT_LLM_PROVIDER):
-                try:
-                    agent.llm_provider = LLMFactory.create_from_config(provider, agent.tools)
-                except Exception as e:
-                    return {"error": f"Failed to switch to {provider}: {str(e)}"}, 500
+            messages = [item.get('message', '') for item in items]
+            if not all(messages):
+                return {"error": "Every item needs a message"}, 400
+            session_ids = [item.get('session_id', 'default') for item in items]
             
-            if stream:
-                # For streaming, we need to bypass Flask-RESTX marshalling
-                # and return a Flask Response directly
-                def generate():
-                    yield from agent.stream_response(message, session_id)
-                
-                return Response(
-                    generate(),
-                    mimetype='text/event-stream',
-                    headers={
-                        'Cache-Control': 'no-cache',
-                        'Connection': 'keep-alive',
-                        'Access-Control-Allow-Origin': '*'
-                    }
-                )
-            else:
-                # Non-streaming response
-                result = agent.process_message(message, session_id)
-                return result
+            return {"results": agent.process_batch(messages, session_ids)}
         
         except Exception as e:
             return {"error": str(e)}, 500
@@ -175,22 +317,24 @@ class Chat(Resource):
 @memory_ns.route('/status/<string:session_id>')
 class MemoryStatus(Resource):
     @memory_ns.doc('get_memory_status')
-    @memory_ns.marshal_with(memory_status_response)
+    @memory_ns.response(200, 'Success', memory_status_response)
     @memory_ns.response(500, 'Internal Server Error', error_response)
     def get(self, session_id):
         """Get memory status for a session"""
         try:
+            agent = get_agent()
             history = agent.get_session_history(session_id)
+            messages = []
+            for msg in history[-5:]:  # Show last 5 messages
+                content = msg["content"]
+                messages.append({
+                    "role": msg["role"],
+                    "content": content[:100] + "..." if len(content) > 100 else content
+                })
             return {
                 "session_id": session_id,
                 "message_count": len(history),
-                "messages": [
-                    {
-                        "role": msg.get("role", "unknown"),
-                        "content": msg.get("content", "")[:100] + "..." if len(msg.get("content", "")) > 100 else msg.get("content", "")
-                    }
-                    for msg in history[-5:]  # Show last 5 messages
-                ]
+                "messages": messages
             }
         except Exception as e:
             return {"error": str(e)}, 500
@@ -204,6 +348,7 @@ class MemoryClear(Resource):
     def delete(self, session_id):
         """Clear memory for a specific session"""
         try:
+            agent = get_agent()
             agent.clear_session_history(session_id)
             return {"message": f"Memory cleared for session {session_id}"}
         except Exception as e:
@@ -213,25 +358,15 @@ class MemoryClear(Resource):
 @llm_ns.route('/providers')
 class LLMProviders(Resource):
     @llm_ns.doc('get_llm_providers')
-    @llm_ns.marshal_with(llm_providers_response)
+    @llm_ns.response(200, 'Success', llm_providers_response)
     @llm_ns.response(500, 'Internal Server Error', error_response)
     def get(self):
         """Get available LLM providers and their configuration status"""
         try:
-            providers = LLMFactory.get_available_providers()
-            provider_status = {
-                "google_gemini": config.GOOGLE_API_KEY is not None,
-                "openai": config.OPENAI_API_KEY is not None,
-                "groq": config.GROQ_API_KEY is not None,
-                "perplexity": config.PERPLEXITY_API_KEY is not None
-            }
-            
-            current_provider = getattr(agent.llm_provider, "provider", config.DEFAULT_LLM_PROVIDER)
-            
+            # Only the current provider changes at runtime
             return {
-                "available_providers": providers,
-                "configured_providers": provider_status,
-                "current_provider": current_provider,
+                **_provider_catalog(),
+                "current_provider": get_agent().current_provider_name,
                 "default_provider": config.DEFAULT_LLM_PROVIDER
             }
         except Exception as e:
@@ -254,22 +389,18 @@ class LLMSwitch(Resource):
             if not provider:
                 return {"error": "Provider name is required"}, 400
             
-            if provider not in LLMFactory.get_available_providers():
+            if provider not in _provider_catalog()["available_providers"]:
                 return {"error": f"Unsupported provider: {provider}"}, 400
             
             # Check if provider is configured
-            if provider == "google_gemini" and not config.GOOGLE_API_KEY:
-                return {"error": "Google Gemini API key is not configured"}, 400
-            elif provider == "openai" and not config.OPENAI_API_KEY:
-                return {"error": "OpenAI API key is not configured"}, 400
-            elif provider == "groq" and not config.GROQ_API_KEY:
-                return {"error": "Groq API key is not configured"}, 400
-            elif provider == "perplexity" and not config.PERPLEXITY_API_KEY:
-                return {"error": "Perplexity API key is not configured"}, 400
+            key_info = _PROVIDER_API_KEYS.get(provider)
+            if key_info is not None and not getattr(config, key_info[1]):
+                return {"error": f"{key_info[0]} API key is not configured"}, 400
             
-            # Create new provider
+            # Switch to the cached provider, creating it on first use
             try:
-                agent.llm_provider = LLMFactory.create_from_config(provider, agent.tools)
+                agent = get_agent()
+                agent.llm_provider = agent.get_provider(provider)
                 return {
                     "message": f"Switched to {provider} provider",
                     "provider": provider
@@ -280,50 +411,30 @@ class LLMSwitch(Resource):
         except Exception as e:
              return {"error": str(e)}, 500
 
+# Streaming chat endpoint, registered as a plain Flask route so streamed
+# requests skip the Flask-RESTX resource dispatch entirely
+@app.route('/api/v1/chat/stream', methods=['POST'])
+def chat_stream():
+    """Streaming chat endpoint"""
+    try:
+        return _plain_response(_handle_chat(request.get_json(), True))
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # Backward compatibility routes (legacy endpoints)
 @app.route('/health', methods=['GET'])
 def health_check_legacy():
     """Legacy health check endpoint for backward compatibility"""
-    return jsonify({"status": "healthy", "message": "Trip Advisor - AI Agent API is running"})
+    return Response(_HEALTH_BODY, mimetype='application/json')
 
 @app.route('/chat', methods=['POST'])
 def chat_legacy():
     """Legacy chat endpoint for backward compatibility"""
     try:
         data = request.get_json()
-        message = data.get('message', '')
-        session_id = data.get('session_id', 'default')
-        provider = data.get('provider')  # Optional provider override
-        stream = data.get('stream', True)  # Default to streaming
-        
-        if not message:
-            return jsonify({"error": "Message is required"}), 400
-        
-        # Switch provider if specified
-        if provider and provider != getattr(agent.llm_provider, "provider", config.DEFAULT_LLM_PROVIDER):
-            try:
-                agent.llm_provider = LLMFactory.create_from_config(provider, agent.tools)
-            except Exception as e:
-                return jsonify({"error": f"Failed to switch to {provider}: {str(e)}"}), 500
-        
-        if stream:
-            # Streaming response
-            def generate():
-                yield from agent.stream_response(message, session_id)
-            
-            return Response(
-                generate(),
-                mimetype='text/event-stream',
-                headers={
-                    'Cache-Control': 'no-cache',
-                    'Connection': 'keep-alive',
-                    'Access-Control-Allow-Origin': '*'
-                }
-            )
-        else:
-            # Non-streaming response
-            result = agent.process_message(message, session_id)
-            return jsonify(result)
+        # Default to streaming
+        return _plain_response(_handle_chat(data, data.get('stream', True)))
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -332,8 +443,12 @@ if __name__ == '__main__':
     print(f"\n🚀 Starting Trip Advisor - AI Agent server on {config.FLASK_HOST}:{config.FLASK_PORT}")
     print(f"📱 Web interface: http://localhost:{config.FLASK_PORT}")
     print(f"🖥️  Open client.html in your browser to interact with the agent")
+    print("🏭 Development server; use ./run_gunicorn.sh (gevent workers) in production")
     print("\nPress Ctrl+C to stop the server\n")
     
+    # Build the agent up front so the first request does not pay for it
+    get_agent()
+    
     app.run(
         debug=config.FLASK_DEBUG,
         host=config.FLASK_HOST,
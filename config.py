@@ -34,12 +34,18 @@ class Config:
     LANGSMITH_ENDPOINT = os.getenv("LANGSMITH_ENDPOINT", "https://api.smith.langchain.com")
     LANGSMITH_API_KEY = os.getenv("LANGSMITH_API_KEY")
     LANGSMITH_PROJECT = os.getenv("LANGSMITH_PROJECT", "trip-agent")
+    LANGSMITH_SAMPLE_RATE = float(os.getenv("LANGSMITH_SAMPLE_RATE", 1.0))  # Fraction of calls traced
     
     # Flask Configuration
     FLASK_HOST = os.getenv("FLASK_HOST", "0.0.0.0")
     FLASK_PORT = int(os.getenv("FLASK_PORT", 5001))
     FLASK_DEBUG = os.getenv("FLASK_DEBUG", "True").lower() == "true"
     
+    # Profiling Configuration (opt-in; writes one .prof file per sampled request)
+    FLASK_PROFILE = os.getenv("FLASK_PROFILE", "False").lower() == "true"
+    FLASK_PROFILE_DIR = os.getenv("FLASK_PROFILE_DIR", "./profiles")
+    FLASK_PROFILE_SAMPLE_RATE = float(os.getenv("FLASK_PROFILE_SAMPLE_RATE", 1.0))  # Fraction of requests profiled
+    
     # Agent Configuration
     AGENT_TEMPERATURE = float(os.getenv("AGENT_TEMPERATURE", 0.7))
     AGENT_MAX_ITERATIONS = int(os.getenv("AGENT_MAX_ITERATIONS", 5))
@@ -48,11 +54,33 @@ class Config:
     # Memory Configuration
     MEMORY_MAX_MESSAGES = int(os.getenv("MEMORY_MAX_MESSAGES", 20))
     MEMORY_OPTIMIZATION_INTERVAL = int(os.getenv("MEMORY_OPTIMIZATION_INTERVAL", 10))
+    MAX_HISTORY_TOKENS = int(os.getenv("MAX_HISTORY_TOKENS", 4096))  # Counted with tiktoken; ~4 chars/token if it cannot load
+    MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", 10000))  # 0 keeps every session
+    SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL")  # Optional shared session store; needs redis
+    SESSION_TTL = int(os.getenv("SESSION_TTL", 86400))  # Seconds a stored session outlives its last message
     
     # Streaming Configuration
-    STREAMING_DELAY = float(os.getenv("STREAMING_DELAY", 0.01))
+    STREAMING_DELAY = float(os.getenv("STREAMING_DELAY", 0))  # 0 disables token pacing
+    STREAM_BATCH_CHARS = int(os.getenv("STREAM_BATCH_CHARS", 64))  # Text per SSE frame; 0 sends every token
+    STREAM_BATCH_INTERVAL = float(os.getenv("STREAM_BATCH_INTERVAL", 0.02))  # Seconds text may wait for more
     STREAMING_ENABLED = os.getenv("STREAMING_ENABLED", "True").lower() == "true"
     
+    # Batch Chat Configuration
+    CHAT_BATCH_MAX_ITEMS = int(os.getenv("CHAT_BATCH_MAX_ITEMS", 20))
+    
+    # Response Cache Configuration (exact-match cache, temperature 0 only)
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 1024))
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 1800))
+    RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL")  # Optional shared tier; needs redis
+    
+    # Semantic Cache Configuration (near-duplicate queries; needs sentence-transformers)
+    SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "False").lower() == "true"
+    SEMANTIC_CACHE_MODEL = os.getenv("SEMANTIC_CACHE_MODEL", "all-MiniLM-L6-v2")
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.92))
+    
+    # Plan Cache Configuration (answer known trip-plan intents from tools, skipping the LLM)
+    PLAN_CACHE_ENABLED = os.getenv("PLAN_CACHE_ENABLED", "False").lower() == "true"
+    
     # CORS Configuration
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*")
     
@@ -89,6 +117,24 @@ class Config:
         if cls.AGENT_MAX_ITERATIONS < 1:
             errors.append("AGENT_MAX_ITERATIONS must be at least 1")
         
+        if not 0 <= cls.LANGSMITH_SAMPLE_RATE <= 1:
+            errors.append("LANGSMITH_SAMPLE_RATE must be between 0 and 1")
+        
+        if cls.MAX_SESSIONS < 0:
+            errors.append("MAX_SESSIONS must not be negative")
+        
+        if cls.SESSION_TTL < 1:
+            errors.append("SESSION_TTL must be at least 1")
+        
+        if cls.STREAM_BATCH_CHARS < 0 or cls.STREAM_BATCH_INTERVAL < 0:
+            errors.append("STREAM_BATCH_CHARS and STREAM_BATCH_INTERVAL must not be negative")
+        
+        if cls.CHAT_BATCH_MAX_ITEMS < 1:
+            errors.append("CHAT_BATCH_MAX_ITEMS must be at least 1")
+        
+        if not 0 <= cls.FLASK_PROFILE_SAMPLE_RATE <= 1:
+            errors.append("FLASK_PROFILE_SAMPLE_RATE must be between 0 and 1")
+        
         return errors
     
     @classmethod
@@ -103,16 +149,20 @@ class Config:
         print(f"   Temperature: {cls.AGENT_TEMPERATURE}")
         print(f"   Max Iterations: {cls.AGENT_MAX_ITERATIONS}")
         print(f"   Memory Max Messages: {cls.MEMORY_MAX_MESSAGES}")
+        print(f"   Session Store: {'Redis' if cls.SESSION_REDIS_URL else 'In-process'}")
         print(f"   Streaming Enabled: {cls.STREAMING_ENABLED}")
         print(f"   Flask Host: {cls.FLASK_HOST}")
         print(f"   Flask Port: {cls.FLASK_PORT}")
         print(f"   Debug Mode: {cls.FLASK_DEBUG}")
+        if cls.FLASK_PROFILE:
+            print(f"   Profiling: {cls.FLASK_PROFILE_SAMPLE_RATE:.0%} of requests to {cls.FLASK_PROFILE_DIR}")
         print(f"   Google API Key Set: {'Yes' if cls.GOOGLE_API_KEY else 'No'}")
         print(f"   OpenAI API Key Set: {'Yes' if cls.OPENAI_API_KEY else 'No'}")
         print(f"   Groq API Key Set: {'Yes' if cls.GROQ_API_KEY else 'No'}")
         print(f"   Perplexity API Key Set: {'Yes' if cls.PERPLEXITY_API_KEY else 'No'}")
         print(f"   LangSmith Tracing: {'Enabled' if cls.LANGSMITH_TRACING else 'Disabled'}")
         print(f"   LangSmith Project: {cls.LANGSMITH_PROJECT}")
+        print(f"   LangSmith Sample Rate: {cls.LANGSMITH_SAMPLE_RATE:.0%}")
         print(f"   LangSmith API Key Set: {'Yes' if cls.LANGSMITH_API_KEY else 'No'}")
 
 # Development configuration
@@ -1,15 +1,20 @@
 """LLM Factory for supporting multiple LLM providers"""
 
+import ast
+import functools
+import inspect
 import os
 import json
+import re
 import time
 import random
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Generator, Optional
+from typing import Dict, Any, Generator, List, Optional
 import google.generativeai as genai
 from langchain_core.rate_limiters import InMemoryRateLimiter
 import requests
 from config import get_config
+from tools.executor import run_tool_calls
 try:
     from openai import OpenAI, RateLimitError
 except ImportError:
@@ -25,6 +30,67 @@ except ImportError:
 config_class = get_config()
 config = config_class()
 
+# Connections kept per host by pooled provider HTTP sessions; sized for many
+# concurrent streams on one gevent worker
+_HTTP_POOL_MAXSIZE = 50
+
+# Seconds to wait for the tool calls found in one response
+_TOOL_TIMEOUT = 10.0
+
+# Tool call marker with its argument list, as requested in model output
+_TOOL_CALL_PATTERN = re.compile(r'TOOL_CALL:\s*(\w+)\(([^)]*)\)')
+
+@functools.lru_cache(maxsize=1024)
+def _parse_tool_city(params_str: str) -> Optional[str]:
+    """
+    Parse a tool call's argument list into its city argument.
+    
+    Arguments are read with ast.literal_eval, which accepts only Python
+    literals and never executes code; anything else is taken as a bare
+    string. Results are cached, since the same calls (e.g. the weather in
+    one city) recur across responses.
+    
+    Args:
+        params_str (str): Text between the tool call's parentheses
+    
+    Returns:
+        Optional[str]: The city argument, or None if the call has none
+    """
+    if not params_str.strip():
+        return None
+    try:
+        params = ast.literal_eval(f"({params_str})")
+    except Exception:
+        # Fallback: treat as string parameter
+        return params_str.strip('"\'')
+    if isinstance(params, tuple) and len(params) == 1:
+        params = params[0]
+    return params if isinstance(params, str) else None
+
+@functools.lru_cache(maxsize=1)
+def _enable_grpc_gevent():
+    """
+    Make Gemini calls cooperative under gevent workers.
+    
+    google-generativeai talks to Gemini over gRPC, whose C core ignores
+    gevent's socket patching: a blocking generate_content() call stalls
+    every other greenlet on the worker until Gemini answers. gRPC's gevent
+    integration hands its polling to the gevent hub instead, so concurrent
+    Gemini requests on one worker overlap like the HTTP-based providers.
+    Runs once, and only when gevent has patched the process (gunicorn's
+    gevent worker); the development server is left untouched.
+    
+    Note:
+        - Must run before the first gRPC channel is created
+    """
+    try:
+        from gevent import monkey
+    except ImportError:
+        return
+    if monkey.is_module_patched("socket"):
+        from grpc.experimental import gevent as grpc_gevent
+        grpc_gevent.init_gevent()
+
 def exponential_backoff_retry(func, max_retries=6, base_delay=1, max_delay=60):
     """
     Implements exponential backoff retry mechanism for handling rate limit errors from LLM APIs.
@@ -98,6 +164,7 @@ class BaseLLMProvider(ABC):
         self.model_name = model_name
         self.temperature = temperature
         self.tools = tools or {}
+        self._tools_prompt: Optional[str] = None
         self._initialize()
     
     @abstractmethod
@@ -122,7 +189,8 @@ class BaseLLMProvider(ABC):
         pass
     
     @abstractmethod
-    def generate_response(self, prompt: str, max_tokens: int = 2048) -> Dict[str, Any]:
+    def generate_response(self, prompt: str, max_tokens: int = 2048, system_prompt: Optional[str] = None,
+                          cache_key: Optional[str] = None) -> Dict[str, Any]:
         """
         Generate a complete response from the LLM in a single API call.
         
@@ -133,6 +201,11 @@ class BaseLLMProvider(ABC):
         Args:
             prompt (str): The input text/question to send to the LLM
             max_tokens (int): Maximum number of tokens in the response (default: 2048)
+            system_prompt (Optional[str]): Static instructions sent ahead of the prompt.
+                                           Kept separate and first so providers can
+                                           reuse their prompt prefix cache across turns
+            cache_key (Optional[str]): Stable key (e.g. session id) grouping requests
+                                       that share a prefix, for providers that support it
         
         Returns:
             Dict[str, Any]: Standardized response dictionary containing:
@@ -154,7 +227,8 @@ class BaseLLMProvider(ABC):
         pass
     
     @abstractmethod
-    def stream_response(self, prompt: str, max_tokens: int = 2048) -> Generator[str, None, None]:
+    def stream_response(self, prompt: str, max_tokens: int = 2048, system_prompt: Optional[str] = None,
+                        cache_key: Optional[str] = None) -> Generator[str, None, None]:
         """
         Stream response from the LLM as it's being generated.
         
@@ -165,6 +239,11 @@ class BaseLLMProvider(ABC):
         Args:
             prompt (str): The input text/question to send to the LLM
             max_tokens (int): Maximum number of tokens in the response (default: 2048)
+            system_prompt (Optional[str]): Static instructions sent ahead of the prompt.
+                                           Kept separate and first so providers can
+                                           reuse their prompt prefix cache across turns
+            cache_key (Optional[str]): Stable key (e.g. session id) grouping requests
+                                       that share a prefix, for providers that support it
         
         Yields:
             str: Individual chunks of the response as they're generated
@@ -181,6 +260,23 @@ class BaseLLMProvider(ABC):
         pass
         pass
     
+    def _build_messages(self, prompt: str, system_prompt: Optional[str] = None) -> List[Dict[str, str]]:
+        """Build chat messages with the static system prompt first.
+        
+        Args:
+            prompt (str): Per-turn prompt content
+            system_prompt (Optional[str]): Static instructions, if any
+        
+        Returns:
+            List[Dict[str, str]]: OpenAI-style role/content messages
+        """
+        if system_prompt:
+            return [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ]
+        return [{"role": "user", "content": prompt}]
+    
     def _execute_tool(self, tool_name: str, **kwargs) -> str:
         """Execute a tool function"""
         if tool_name in self.tools:
@@ -191,19 +287,26 @@ class BaseLLMProvider(ABC):
         return f"Tool {tool_name} not found"
     
     def _format_tools_for_prompt(self) -> str:
-        """Format available tools for the prompt"""
+        """Format available tools for the prompt.
+        
+        The tools are fixed once the provider is created, so the text is
+        built on first use and reused for every later request.
+        """
+        if self._tools_prompt is not None:
+            return self._tools_prompt
         if not self.tools:
+            self._tools_prompt = ""
             return ""
         
         tools_description = "\n\nAvailable Tools:\n"
         for tool_name, tool_func in self.tools.items():
             # Get function signature and docstring
-            import inspect
             sig = inspect.signature(tool_func)
             doc = tool_func.__doc__ or "No description available"
             tools_description += f"- {tool_name}{sig}: {doc}\n"
         
         tools_description += "\nTo use a tool, include in your response: TOOL_CALL: {tool_name}({parameters})\n"
+        self._tools_prompt = tools_description
         return tools_description
 
 class GoogleGeminiProvider(BaseLLMProvider):
@@ -222,16 +325,37 @@ class GoogleGeminiProvider(BaseLLMProvider):
             - Configures global genai API key
             - Creates self.model as GenerativeModel instance
             - Sets provider for identification
+            - Enables gRPC's gevent integration under gevent workers
         
         Note:
             - Uses the global genai.configure() which affects all genai operations
             - The model is ready for both streaming and non-streaming requests
         """
         self.provider = "google_gemini"
+        _enable_grpc_gevent()
         genai.configure(api_key=self.api_key)
         self.model = genai.GenerativeModel(self.model_name)
+        # Models carrying a system instruction, keyed by that instruction
+        self._instructed_models: Dict[str, Any] = {}
     
-    def generate_response(self, prompt: str, max_tokens: int = 2048) -> Dict[str, Any]:
+    def _model_for(self, system_prompt: Optional[str]):
+        """Return the model to use for a system prompt.
+        
+        The system prompt is sent as Gemini's system_instruction rather than
+        pasted ahead of each prompt, so the static instructions form a fixed
+        prefix Gemini can reuse across turns. Agents send one or two distinct
+        system prompts, so one model is built per prompt and kept.
+        """
+        if not system_prompt:
+            return self.model
+        model = self._instructed_models.get(system_prompt)
+        if model is None:
+            model = genai.GenerativeModel(self.model_name, system_instruction=system_prompt)
+            self._instructed_models[system_prompt] = model
+        return model
+    
+    def generate_response(self, prompt: str, max_tokens: int = 2048, system_prompt: Optional[str] = None,
+                          cache_key: Optional[str] = None) -> Dict[str, Any]:
         """
         Generate a complete response from Google Gemini with tool calling support.
         
@@ -243,6 +367,8 @@ class GoogleGeminiProvider(BaseLLMProvider):
         Args:
             prompt (str): The input text/question to send to Gemini
             max_tokens (int): Maximum number of tokens in the response (default: 2048)
+            system_prompt (Optional[str]): Static instructions, sent as the system instruction
+            cache_key (Optional[str]): Prompt cache routing key (unused by Gemini)
         
         Returns:
             Dict[str, Any]: Standardized response dictionary containing:
@@ -260,7 +386,7 @@ class GoogleGeminiProvider(BaseLLMProvider):
             # Add tools information to prompt
             enhanced_prompt = prompt + self._format_tools_for_prompt()
             
-            response = self.model.generate_content(
+            response = self._model_for(system_prompt).generate_content(
                 enhanced_prompt,
                 generation_config=genai.types.GenerationConfig(
                     temperature=self.temperature,
@@ -288,7 +414,8 @@ class GoogleGeminiProvider(BaseLLMProvider):
                 "model": self.model_name
             }
     
-    def stream_response(self, prompt: str, max_tokens: int = 2048) -> Generator[str, None, None]:
+    def stream_response(self, prompt: str, max_tokens: int = 2048, system_prompt: Optional[str] = None,
+                        cache_key: Optional[str] = None) -> Generator[str, None, None]:
         """
         Stream response from Google Gemini with real-time tool calling support.
         
@@ -299,6 +426,8 @@ class GoogleGeminiProvider(BaseLLMProvider):
         Args:
             prompt (str): The input text/question to send to Gemini
             max_tokens (int): Maximum number of tokens in the response (default: 2048)
+            system_prompt (Optional[str]): Static instructions, sent as the system instruction
+            cache_key (Optional[str]): Prompt cache routing key (unused by Gemini)
         
         Yields:
             str: Individual chunks of the response as they're generated,
@@ -314,7 +443,7 @@ class GoogleGeminiProvider(BaseLLMProvider):
             # Add tools information to prompt
             enhanced_prompt = prompt + self._format_tools_for_prompt()
             
-            response = self.model.generate_content(
+            response = self._model_for(system_prompt).generate_content(
                 enhanced_prompt,
                 generation_config=genai.types.GenerationConfig(
                     temperature=self.temperature,
@@ -323,13 +452,17 @@ class GoogleGeminiProvider(BaseLLMProvider):
                 stream=True
             )
             
-            accumulated_text = ""
+            # Chunks are forwarded as Gemini produces them and kept for the
+            # tool call scan; joined once at the end rather than per chunk
+            chunks = []
             for chunk in response:
-                if chunk.text:
-                    accumulated_text += chunk.text
-                    yield chunk.text
+                text = chunk.text
+                if text:
+                    chunks.append(text)
+                    yield text
             
             # Process any tool calls after streaming is complete
+            accumulated_text = "".join(chunks)
             if "TOOL_CALL:" in accumulated_text:
                 tool_results = self._extract_and_execute_tools(accumulated_text)
                 if tool_results:
@@ -373,13 +506,10 @@ class GoogleGeminiProvider(BaseLLMProvider):
         tool_results = self._extract_and_execute_tools(response_text)
         
         # Replace tool calls with results
-        import re
-        pattern = r'TOOL_CALL:\s*(\w+)\(([^)]*)\)'
-        
         def replace_tool_call(match):
             return tool_results if tool_results else "Tool execution failed"
         
-        processed_text = re.sub(pattern, replace_tool_call, response_text)
+        processed_text = _TOOL_CALL_PATTERN.sub(replace_tool_call, response_text)
         return processed_text
     
     def _extract_and_execute_tools(self, text: str) -> str:
@@ -409,7 +539,9 @@ class GoogleGeminiProvider(BaseLLMProvider):
         
         Processing:
             - Uses regex to find all TOOL_CALL: patterns
-            - Executes each tool via _execute_tool method
+            - Executes each tool via _execute_tool method on the shared tool
+              pool, concurrently when the response contains several calls
+            - Reports a call still running after _TOOL_TIMEOUT as an error
             - Formats results with markdown-style headers
             - Handles errors gracefully with error messages
         
@@ -418,37 +550,36 @@ class GoogleGeminiProvider(BaseLLMProvider):
             - Returns empty string if no tool calls found
             - Each result is separated by double newlines
         """
-        import re
-        import ast
-        
-        pattern = r'TOOL_CALL:\s*(\w+)\(([^)]*)\)'
-        matches = re.findall(pattern, text)
+        matches = _TOOL_CALL_PATTERN.findall(text)
         
-        results = []
-        for tool_name, params_str in matches:
+        def run_tool_call(tool_name, params_str):
             try:
                 # Parse parameters
-                if params_str.strip():
-                    # Try to evaluate as Python literals
-                    try:
-                        params = ast.literal_eval(f"({params_str})")
-                        if isinstance(params, tuple) and len(params) == 1:
-                            params = params[0]
-                        kwargs = {"city": params} if isinstance(params, str) else {}
-                    except:
-                        # Fallback: treat as string parameter
-                        kwargs = {"city": params_str.strip('"\'')} 
-                else:
-                    kwargs = {}
+                city = _parse_tool_city(params_str)
+                kwargs = {"city": city} if city is not None else {}
                 
                 # Execute tool
                 result = self._execute_tool(tool_name, **kwargs)
-                results.append(f"\n\n**{tool_name} Result:**\n{result}")
+                return f"\n\n**{tool_name} Result:**\n{result}"
                 
             except Exception as e:
-                results.append(f"\n\n**{tool_name} Error:**\n{str(e)}")
+                return f"\n\n**{tool_name} Error:**\n{str(e)}"
         
-        return "\n".join(results)
+        if not matches:
+            return ""
+        
+        # Tool calls in one response are independent; the shared tool pool
+        # runs them concurrently, so the batch takes as long as the slowest
+        # tool, not the sum
+        results = run_tool_calls([
+            (tool_name, functools.partial(run_tool_call, tool_name, params_str))
+            for tool_name, params_str in matches
+        ], _TOOL_TIMEOUT)
+        return "\n".join(
+            result if result is not None
+            else f"\n\n**{tool_name} Error:**\nTimed out after {_TOOL_TIMEOUT:g}s"
+            for (tool_name, _), result in zip(matches, results)
+        )
 
 class OpenAIProvider(BaseLLMProvider):
     """OpenAI LLM Provider using LangChain with Rate Limiting"""
@@ -506,7 +637,20 @@ class OpenAIProvider(BaseLLMProvider):
             print(f"Error initializing OpenAI client: {e}")
             raise e
     
-    def generate_response(self, prompt: str, max_tokens: int = 2048) -> Dict[str, Any]:
+    @staticmethod
+    def _cache_body(cache_key: Optional[str]) -> Optional[Dict[str, str]]:
+        """Extra request body routing requests that share a prefix together.
+        
+        Args:
+            cache_key (Optional[str]): Stable key such as the session id
+        
+        Returns:
+            Optional[Dict[str, str]]: prompt_cache_key body, or None without a key
+        """
+        return {"prompt_cache_key": cache_key} if cache_key else None
+    
+    def generate_response(self, prompt: str, max_tokens: int = 2048, system_prompt: Optional[str] = None,
+                          cache_key: Optional[str] = None) -> Dict[str, Any]:
         """Generate response using OpenAI with exponential backoff retry
         
         Sends a prompt to OpenAI and waits for the complete response using
@@ -516,6 +660,8 @@ class OpenAIProvider(BaseLLMProvider):
         Args:
             prompt (str): The input text/question to send to OpenAI
             max_tokens (int): Maximum number of tokens in the response (default: 2048)
+            system_prompt (Optional[str]): Static instructions placed ahead of the prompt
+            cache_key (Optional[str]): Sent as prompt_cache_key to group requests sharing a prefix
         
         Returns:
             Dict[str, Any]: Standardized response dictionary containing:
@@ -557,9 +703,10 @@ class OpenAIProvider(BaseLLMProvider):
             def make_api_call():
                 return self.client.chat.completions.create(
                     model=self.model_name,
-                    messages=[{"role": "user", "content": prompt}],
+                    messages=self._build_messages(prompt, system_prompt),
                     temperature=self.temperature,
-                    max_tokens=max_tokens
+                    max_tokens=max_tokens,
+                    extra_body=self._cache_body(cache_key)
                 )
             
             # Use exponential backoff retry for the API call
@@ -586,7 +733,8 @@ class OpenAIProvider(BaseLLMProvider):
                 "model": self.model_name
             }
     
-    def stream_response(self, prompt: str, max_tokens: int = 2048) -> Generator[str, None, None]:
+    def stream_response(self, prompt: str, max_tokens: int = 2048, system_prompt: Optional[str] = None,
+                        cache_key: Optional[str] = None) -> Generator[str, None, None]:
         """Stream response using OpenAI with exponential backoff retry
         
         Sends a prompt to OpenAI and yields response chunks as they become
@@ -596,6 +744,8 @@ class OpenAIProvider(BaseLLMProvider):
         Args:
             prompt (str): The input text/question to send to OpenAI
             max_tokens (int): Maximum number of tokens in the response (default: 2048)
+            system_prompt (Optional[str]): Static instructions placed ahead of the prompt
+            cache_key (Optional[str]): Sent as prompt_cache_key to group requests sharing a prefix
         
         Yields:
             str: Individual chunks of the response as they're generated,
@@ -636,10 +786,11 @@ class OpenAIProvider(BaseLLMProvider):
             def make_streaming_call():
                 return self.client.chat.completions.create(
                     model=self.model_name,
-                    messages=[{"role": "user", "content": prompt}],
+                    messages=self._build_messages(prompt, system_prompt),
                     temperature=self.temperature,
                     max_tokens=max_tokens,
-                    stream=True
+                    stream=True,
+                    extra_body=self._cache_body(cache_key)
                 )
             
             # Use exponential backoff retry for the streaming API call
@@ -675,7 +826,7 @@ class GroqProvider(BaseLLMProvider):
         Note:
             - Groq doesn't require a client library initialization
             - Uses OpenAI-compatible API endpoints
-            - Headers are reused for all API requests
+            - Headers and connections are reused for all API requests
         """
         self.provider = "groq"
         self.base_url = "https://api.groq.com/openai/v1"
@@ -683,8 +834,14 @@ class GroqProvider(BaseLLMProvider):
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        # Pooled session: TLS connections to Groq are kept alive and reused
+        # across requests instead of being opened for every call
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=_HTTP_POOL_MAXSIZE))
     
-    def generate_response(self, prompt: str, max_tokens: int = 2048) -> Dict[str, Any]:
+    def generate_response(self, prompt: str, max_tokens: int = 2048, system_prompt: Optional[str] = None,
+                          cache_key: Optional[str] = None) -> Dict[str, Any]:
         """
         Generate a complete response from Groq API.
         
@@ -695,6 +852,8 @@ class GroqProvider(BaseLLMProvider):
         Args:
             prompt (str): The input text/question to send to Groq
             max_tokens (int): Maximum number of tokens in the response (default: 2048)
+            system_prompt (Optional[str]): Static instructions placed ahead of the prompt
+            cache_key (Optional[str]): Prompt cache routing key (unused by Groq)
         
         Returns:
             Dict[str, Any]: Standardized response dictionary containing:
@@ -722,14 +881,13 @@ class GroqProvider(BaseLLMProvider):
         try:
             payload = {
                 "model": self.model_name,
-                "messages": [{"role": "user", "content": prompt}],
+                "messages": self._build_messages(prompt, system_prompt),
                 "temperature": self.temperature,
                 "max_tokens": max_tokens
             }
             
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/chat/completions",
-                headers=self.headers,
                 json=payload
             )
             
@@ -753,7 +911,8 @@ class GroqProvider(BaseLLMProvider):
                 "model": self.model_name
             }
     
-    def stream_response(self, prompt: str, max_tokens: int = 2048) -> Generator[str, None, None]:
+    def stream_response(self, prompt: str, max_tokens: int = 2048, system_prompt: Optional[str] = None,
+                        cache_key: Optional[str] = None) -> Generator[str, None, None]:
         """
         Stream response from Groq API as it's being generated.
         
@@ -764,6 +923,8 @@ class GroqProvider(BaseLLMProvider):
         Args:
             prompt (str): The input text/question to send to Groq
             max_tokens (int): Maximum number of tokens in the response (default: 2048)
+            system_prompt (Optional[str]): Static instructions placed ahead of the prompt
+            cache_key (Optional[str]): Prompt cache routing key (unused by Groq)
         
         Yields:
             str: Individual chunks of the response as they're generated,
@@ -795,28 +956,28 @@ class GroqProvider(BaseLLMProvider):
         try:
             payload = {
                 "model": self.model_name,
-                "messages": [{"role": "user", "content": prompt}],
+                "messages": self._build_messages(prompt, system_prompt),
                 "temperature": self.temperature,
                 "max_tokens": max_tokens,
                 "stream": True
             }
             
-            response = requests.post(
+            # Closing the response returns its connection to the pool, even
+            # when the consumer stops reading early
+            with self.session.post(
                 f"{self.base_url}/chat/completions",
-                headers=self.headers,
                 json=payload,
                 stream=True
-            )
-            
-            response.raise_for_status()
-            
-            for line in response.iter_lines():
-                if line:
-                    line = line.decode("utf-8")
-                    if line.startswith("data: ") and not line.startswith("data: [DONE]"):
-                        data = json.loads(line[6:])
-                        if data.get("choices") and data["choices"][0].get("delta") and data["choices"][0]["delta"].get("content"):
-                            yield data["choices"][0]["delta"]["content"]
+            ) as response:
+                response.raise_for_status()
+                
+                for line in response.iter_lines():
+                    if line:
+                        line = line.decode("utf-8")
+                        if line.startswith("data: ") and not line.startswith("data: [DONE]"):
+                            data = json.loads(line[6:])
+                            if data.get("choices") and data["choices"][0].get("delta") and data["choices"][0]["delta"].get("content"):
+                                yield data["choices"][0]["delta"]["content"]
                             
         except Exception as e:
             yield f"Error streaming response: {str(e)}"
@@ -824,6 +985,22 @@ class GroqProvider(BaseLLMProvider):
 class PerplexityProvider(BaseLLMProvider):
     """Perplexity LLM Provider using ChatPerplexity from langchain-perplexity"""
     
+    @staticmethod
+    def _build_langchain_messages(prompt: str, system_prompt: Optional[str] = None) -> list:
+        """Build LangChain messages with the static system prompt first.
+        
+        Args:
+            prompt (str): Per-turn prompt content
+            system_prompt (Optional[str]): Static instructions, if any
+        
+        Returns:
+            list: SystemMessage (if any) followed by the HumanMessage
+        """
+        from langchain_core.messages import HumanMessage, SystemMessage
+        if system_prompt:
+            return [SystemMessage(content=system_prompt), HumanMessage(content=prompt)]
+        return [HumanMessage(content=prompt)]
+    
     def _initialize(self):
         """
         Initialize Perplexity client using ChatPerplexity with rate limiting.
@@ -878,7 +1055,8 @@ class PerplexityProvider(BaseLLMProvider):
             max_bucket_size=5  # Allow small bursts
         )
     
-    def generate_response(self, prompt: str, max_tokens: int = 2048) -> Dict[str, Any]:
+    def generate_response(self, prompt: str, max_tokens: int = 2048, system_prompt: Optional[str] = None,
+                          cache_key: Optional[str] = None) -> Dict[str, Any]:
         """
         Generate a complete response from Perplexity using ChatPerplexity with rate limiting.
         
@@ -889,6 +1067,8 @@ class PerplexityProvider(BaseLLMProvider):
         Args:
             prompt (str): The input text/question to send to Perplexity
             max_tokens (int): Maximum number of tokens (unused by ChatPerplexity)
+            system_prompt (Optional[str]): Static instructions placed ahead of the prompt
+            cache_key (Optional[str]): Prompt cache routing key (unused by ChatPerplexity)
         
         Returns:
             Dict[str, Any]: Standardized response dictionary containing:
@@ -929,8 +1109,7 @@ class PerplexityProvider(BaseLLMProvider):
             
             # Define the API call function for retry logic
             def make_api_call():
-                from langchain_core.messages import HumanMessage
-                messages = [HumanMessage(content=prompt)]
+                messages = self._build_langchain_messages(prompt, system_prompt)
                 return self.client.invoke(messages)
             
             # Use exponential backoff retry for the API call
@@ -958,7 +1137,8 @@ class PerplexityProvider(BaseLLMProvider):
                 "model": self.model_name
             }
     
-    def stream_response(self, prompt: str, max_tokens: int = 2048) -> Generator[str, None, None]:
+    def stream_response(self, prompt: str, max_tokens: int = 2048, system_prompt: Optional[str] = None,
+                        cache_key: Optional[str] = None) -> Generator[str, None, None]:
         """
         Stream response from Perplexity using ChatPerplexity with rate limiting.
         
@@ -969,6 +1149,8 @@ class PerplexityProvider(BaseLLMProvider):
         Args:
             prompt (str): The input text/question to send to Perplexity
             max_tokens (int): Maximum number of tokens (unused by ChatPerplexity)
+            system_prompt (Optional[str]): Static instructions placed ahead of the prompt
+            cache_key (Optional[str]): Prompt cache routing key (unused by ChatPerplexity)
         
         Yields:
             str: Individual chunks of the response as they're generated,
@@ -1007,8 +1189,7 @@ class PerplexityProvider(BaseLLMProvider):
             
             # Define the streaming API call function for retry logic
             def make_streaming_call():
-                from langchain_core.messages import HumanMessage
-                messages = [HumanMessage(content=prompt)]
+                messages = self._build_langchain_messages(prompt, system_prompt)
                 return self.client.stream(messages)
             
             # Use exponential backoff retry for the streaming API call
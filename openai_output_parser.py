@@ -5,7 +5,7 @@ import re
 from typing import Dict, Any, Generator, Tuple
 from enum import Enum
 from dataclasses import dataclass
-from output_parser import OutputParser, ParsedToken, TokenType
+from output_parser import OutputParser, ParsedToken, TokenType, dumps_json, dumps_json_bytes
 
 class OpenAITokenType(Enum):
     """OpenAI-specific token types for enhanced parsing"""
@@ -484,14 +484,33 @@ class OpenAIOutputParser(OutputParser):
         - Ensures JSON serialization compatibility
         - Maintains debugging information through raw_delta inclusion
         """
-        data = {
-            'token': parsed_token.content,
-            'type': parsed_token.token_type.value
-        }
+        return f"data: {dumps_json(self._openai_sse_payload(parsed_token))}\n\n"
+    
+    def format_openai_for_sse_bytes(self, parsed_token: OpenAIParsedToken) -> bytes:
+        """Format an OpenAI ParsedToken as a UTF-8 encoded Server-Sent Events frame.
         
-        # Add metadata if present
-        if parsed_token.metadata:
-            data.update(parsed_token.metadata)
+        Carries the same payload as format_openai_for_sse, serialized straight
+        to bytes (with orjson when installed) so the frame can be written to
+        the response without a separate encode step.
+        
+        Args:
+            parsed_token (OpenAIParsedToken): OpenAI-specific parsed token
+            
+        Returns:
+            bytes: SSE frame with 'data: ' prefix and JSON payload
+        """
+        return b"data: " + dumps_json_bytes(self._openai_sse_payload(parsed_token)) + b"\n\n"
+    
+    def _openai_sse_payload(self, parsed_token: OpenAIParsedToken) -> Dict[str, Any]:
+        """Build the SSE JSON payload for an OpenAI ParsedToken.
+        
+        Args:
+            parsed_token (OpenAIParsedToken): OpenAI-specific parsed token
+            
+        Returns:
+            Dict[str, Any]: Token content and type with metadata and OpenAI fields
+        """
+        data = self._sse_payload(parsed_token)
         
         # Add OpenAI-specific fields
         if parsed_token.finish_reason:
@@ -503,7 +522,7 @@ class OpenAIOutputParser(OutputParser):
         if parsed_token.raw_delta:
             data['raw_delta'] = parsed_token.raw_delta
         
-        return f"data: {json.dumps(data)}\n\n"
+        return data
     
     def convert_to_standard_token(self, openai_token: OpenAIParsedToken) -> ParsedToken:
         """Convert OpenAI token to standard ParsedToken for cross-provider compatibility.
@@ -7,6 +7,13 @@ from openai_output_parser import OpenAIOutputParser, OpenAIParsedToken, OpenAITo
 from output_parser import ParsedToken, TokenType
 from config import Config
 
+# Structural token types, emitted without streaming delay
+_UNDELAYED_TOKEN_TYPES = frozenset({
+    OpenAITokenType.OPENAI_THINKING_START,
+    OpenAITokenType.OPENAI_THINKING_END,
+    OpenAITokenType.OPENAI_COMPLETE
+})
+
 class OpenAIStreamingHandler:
     """OpenAI-specific streaming handler with enhanced error handling and response processing."""
     
@@ -105,7 +112,7 @@ class OpenAIStreamingHandler:
         2. Parses chunks using specialized OpenAI parser
         3. Logs OpenAI-specific events for monitoring
         4. Formats tokens for SSE streaming
-        5. Applies appropriate streaming delays
+        5. Paces content tokens when STREAMING_DELAY is set
         6. Handles errors with proper recovery
         
         Error Handling:
@@ -125,11 +132,53 @@ class OpenAIStreamingHandler:
                 
         Notes:
         - Uses OpenAI-specific parsing logic for better accuracy
-        - Applies streaming delays for improved user experience
+        - Optionally paces content tokens (STREAMING_DELAY, off by default)
         - Provides comprehensive logging for debugging
         - Maintains OpenAI response format consistency
         """
+        for openai_token in self._iter_openai_tokens(openai_stream, session_id):
+            yield self.openai_parser.format_openai_for_sse(openai_token)
+    
+    def stream_openai_sse_bytes(
+        self,
+        openai_stream: Generator[str, None, None],
+        session_id: str = "default"
+    ) -> Generator[bytes, None, None]:
+        """Stream an OpenAI response as UTF-8 encoded Server-Sent Events frames.
+        
+        Produces the same frames as create_compatibility_stream, which
+        re-parses and re-serializes each frame into an identical payload,
+        but serializes every token once, straight to bytes.
+        
+        Args:
+            openai_stream (Generator[str, None, None]): Raw token stream from OpenAI provider
+            session_id (str, optional): Session identifier for tracking and logging.
+                                       Defaults to "default"
+            
+        Yields:
+            bytes: SSE frames ready to be written to the response
+        """
+        format_sse = self.openai_parser.format_openai_for_sse_bytes
+        for openai_token in self._iter_openai_tokens(openai_stream, session_id):
+            yield format_sse(openai_token)
+    
+    def _iter_openai_tokens(
+        self,
+        openai_stream: Generator[str, None, None],
+        session_id: str
+    ) -> Generator[OpenAIParsedToken, None, None]:
+        """Parse, log and pace an OpenAI token stream.
         
+        Shared by the str and bytes SSE streams; on failure, yields an error
+        token followed by a completion token.
+        
+        Args:
+            openai_stream (Generator[str, None, None]): Raw token stream from OpenAI provider
+            session_id (str): Session identifier for tracking and logging
+            
+        Yields:
+            OpenAIParsedToken: Parsed tokens in stream order
+        """
         self.log_openai_event("openai_start", f"Starting OpenAI stream processing for session {session_id}")
         
         try:
@@ -139,18 +188,24 @@ class OpenAIStreamingHandler:
             # Parse OpenAI chunks using the specialized parser
             parsed_stream = self.openai_parser.parse_openai_stream(openai_chunks)
             
+            # Pace content tokens to at most one per STREAMING_DELAY, counting
+            # time spent waiting on OpenAI toward the delay; 0 disables pacing
+            streaming_delay = Config.STREAMING_DELAY
+            next_emit = 0.0
+            
             # Process and yield formatted tokens
             for openai_token in parsed_stream:
                 # Log OpenAI-specific events
                 self._log_openai_token_event(openai_token)
                 
-                # Format for SSE with OpenAI-specific data
-                sse_data = self.openai_parser.format_openai_for_sse(openai_token)
-                yield sse_data
+                # Hold back non-control tokens only when upstream outpaces the delay
+                if streaming_delay > 0 and self._should_add_delay(openai_token):
+                    wait = next_emit - time.monotonic()
+                    if wait > 0:
+                        time.sleep(wait)
+                    next_emit = time.monotonic() + streaming_delay
                 
-                # Add streaming delay for non-control tokens
-                if self._should_add_delay(openai_token):
-                    time.sleep(Config.STREAMING_DELAY)
+                yield openai_token
             
             self.log_openai_event("openai_complete", "OpenAI stream processing completed successfully")
             
@@ -158,22 +213,18 @@ class OpenAIStreamingHandler:
             self.log_openai_event("openai_error", f"Error in OpenAI streaming: {str(e)}")
             
             # Yield error token in OpenAI format
-            error_token = OpenAIParsedToken(
+            yield OpenAIParsedToken(
                 content=f"OpenAI streaming error: {str(e)}",
                 token_type=OpenAITokenType.OPENAI_ERROR,
                 metadata={"error_type": "openai_streaming_error", "session_id": session_id}
             )
             
-            yield self.openai_parser.format_openai_for_sse(error_token)
-            
             # Yield completion token
-            complete_token = OpenAIParsedToken(
+            yield OpenAIParsedToken(
                 content="",
                 token_type=OpenAITokenType.OPENAI_COMPLETE,
                 metadata={"error_recovery": True, "session_id": session_id}
             )
-            
-            yield self.openai_parser.format_openai_for_sse(complete_token)
     
     def _convert_tokens_to_openai_chunks(self, token_stream: Generator[str, None, None]) -> Generator[Dict[str, Any], None, None]:
         """Convert raw token stream to OpenAI chunk format for processing.
@@ -325,13 +376,7 @@ class OpenAIStreamingHandler:
         - Applies delays only to visible content
         """
         
-        control_types = {
-            OpenAITokenType.OPENAI_THINKING_START,
-            OpenAITokenType.OPENAI_THINKING_END,
-            OpenAITokenType.OPENAI_COMPLETE
-        }
-        
-        return token.token_type not in control_types
+        return token.token_type not in _UNDELAYED_TOKEN_TYPES
     
     def process_openai_non_streaming_response(
         self, 
@@ -3,10 +3,50 @@
 import json
 import re
 import sys
-from typing import Dict, Any, Generator, Tuple, Optional
+import time
+from typing import Dict, Any, Generator, Iterable, Tuple, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps_json_bytes(data: Any) -> bytes:
+    """Serialize data to UTF-8 JSON bytes, using orjson when it is installed.
+    
+    Args:
+        data: JSON-serializable value
+        
+    Returns:
+        bytes: Compact JSON document
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode("ascii")
+
+def dumps_json(data: Any) -> str:
+    """Serialize data to JSON text, the same document dumps_json_bytes encodes.
+    
+    Args:
+        data: JSON-serializable value
+        
+    Returns:
+        str: Compact JSON document; its UTF-8 encoding equals dumps_json_bytes(data)
+    """
+    if orjson is not None:
+        return orjson.dumps(data).decode("utf-8")
+    return json.dumps(data, separators=(",", ":"))
+
+# A complete (or unterminated) thinking section, or a stray thinking tag,
+# in any of the supported tag formats
+_THINKING_SECTION = re.compile(
+    r'<(?:thinking|think|reasoning|analysis)>.*?(?:</(?:thinking|think|reasoning|analysis)>|\Z)'
+    r'|</?(?:thinking|think|reasoning|analysis)>',
+    re.IGNORECASE | re.DOTALL
+)
+
 class TokenType(Enum):
     """Types of tokens in the response stream"""
     THINKING_START = "thinking_start"
@@ -29,6 +69,66 @@ class ParsedToken:
     token_type: TokenType
     metadata: Optional[Dict[str, Any]] = None
 
+# Content token types whose runs may be merged into one SSE frame
+_BATCHABLE_TOKEN_TYPES = frozenset({TokenType.THINKING, TokenType.RESPONSE})
+
+def batch_tokens(parsed_stream: Iterable[ParsedToken], max_chars: int = 64,
+                 max_delay: float = 0.02) -> Generator[ParsedToken, None, None]:
+    """Merge runs of content tokens so each SSE frame carries a chunk of text.
+    
+    Providers stream a few characters per token, and every token costs a
+    JSON encode, a socket write and a client re-render. Consecutive
+    thinking or response tokens are joined until the run holds max_chars
+    characters or its first token is max_delay seconds old, then sent as a
+    single token carrying the latest token's metadata. Control, tool and
+    error tokens flush the pending run and pass through unchanged, so
+    frame order and the text the client assembles are preserved.
+    
+    Args:
+        parsed_stream (Iterable[ParsedToken]): Parsed tokens in stream order
+        max_chars (int): Characters that trigger a flush; 0 disables batching
+        max_delay (float): Seconds the oldest pending text may be held
+        
+    Yields:
+        ParsedToken: Tokens with content runs merged
+        
+    Note:
+        - The age check runs as tokens arrive; text pending when upstream
+          stalls is sent with the next token or at the end of the stream
+    """
+    if max_chars <= 0:
+        yield from parsed_stream
+        return
+    
+    monotonic = time.monotonic
+    parts = []
+    size = 0
+    started = 0.0
+    last = None
+    for token in parsed_stream:
+        if token.token_type in _BATCHABLE_TOKEN_TYPES:
+            if parts and token.token_type is not last.token_type:
+                yield ParsedToken("".join(parts), last.token_type, last.metadata)
+                parts = []
+            if not parts:
+                size = 0
+                started = monotonic()
+            parts.append(token.content)
+            size += len(token.content)
+            last = token
+            if size >= max_chars or monotonic() - started >= max_delay:
+                yield ParsedToken("".join(parts), last.token_type, last.metadata)
+                parts = []
+            continue
+        
+        if parts:
+            yield ParsedToken("".join(parts), last.token_type, last.metadata)
+            parts = []
+        yield token
+    
+    if parts:
+        yield ParsedToken("".join(parts), last.token_type, last.metadata)
+
 class OutputParser:
     """Standardized output parser for all LLM providers"""
     
@@ -616,6 +716,28 @@ class OutputParser:
             # If no end tag found, return the final response we accumulated
             return self.final_response.strip()
     
+    def clean_full_response(self, text: str) -> str:
+        """Extract the final response from a complete, non-streamed response.
+        
+        Equivalent to running the text through parse_stream and calling
+        extract_final_response, but done in a single regex pass without
+        touching the parser's streaming state, so it is safe to call from
+        concurrent requests sharing one parser.
+        
+        Cleaning Operations:
+        - Removes thinking sections together with their content
+        - Drops an unterminated thinking section up to the end of the text
+        - Removes stray thinking tags
+        - Strips surrounding whitespace
+        
+        Args:
+            text (str): Complete response text
+            
+        Returns:
+            str: Clean final response content without thinking sections
+        """
+        return _THINKING_SECTION.sub('', text).strip()
+    
     def format_for_sse(self, parsed_token: ParsedToken) -> str:
         """Format a ParsedToken for Server-Sent Events with proper protocol compliance.
         
@@ -660,6 +782,35 @@ class OutputParser:
         - Preserves all token information for client processing
         - Essential for real-time web response streaming
         """
+        return f"data: {dumps_json(self._sse_payload(parsed_token))}\n\n"
+    
+    def format_for_sse_bytes(self, parsed_token: ParsedToken) -> bytes:
+        """Format a ParsedToken as an encoded Server-Sent Events frame.
+        
+        Same frame as format_for_sse, byte for byte once encoded, built
+        directly as bytes so a WSGI server can write it without encoding it
+        again. Serialized with orjson when installed, which produces bytes
+        without an intermediate str.
+        
+        Args:
+            parsed_token (ParsedToken): Structured token with content, type, and metadata
+            
+        Returns:
+            bytes: SSE frame with data prefix and JSON payload
+        """
+        return b"data: " + dumps_json_bytes(self._sse_payload(parsed_token)) + b"\n\n"
+    
+    def _sse_payload(self, parsed_token: ParsedToken) -> Dict[str, Any]:
+        """Build the SSE JSON payload for a ParsedToken.
+        
+        Shared by the str and bytes formatters, so both carry the same fields.
+        
+        Args:
+            parsed_token (ParsedToken): Structured token with content, type, and metadata
+            
+        Returns:
+            Dict[str, Any]: Token content and type with any metadata
+        """
         data = {
             'token': parsed_token.content,
             'type': parsed_token.token_type.value
@@ -669,7 +820,7 @@ class OutputParser:
         if parsed_token.metadata:
             data.update(parsed_token.metadata)
         
-        return f"data: {json.dumps(data)}\n\n"
+        return data
     
     def validate_response_structure(self, response_data: Dict[str, Any]) -> Dict[str, Any]:
         """Validate and standardize response structure from different providers.
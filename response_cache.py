@@ -0,0 +1,121 @@
+"""Exact-match cache for deterministic LLM responses"""
+
+import json
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+try:
+    from cachetools import TTLCache
+except ImportError:
+    TTLCache = None
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """Cache of provider responses keyed by a hash of the full request.
+
+    Entries live in an in-process TTL cache. When a Redis URL is configured
+    and the redis package is installed, entries are also written to Redis
+    with the same TTL, so responses survive restarts and are shared between
+    server processes; local misses fall back to Redis before the LLM is
+    called.
+
+    Hits and misses are counted for observability; see stats().
+
+    Note:
+        - Requires the cachetools package; check `enabled` before use
+        - Redis errors are logged and treated as misses, so an unavailable
+          Redis never fails a request
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: int = 1800, redis_url: Optional[str] = None):
+        """
+        Initialize the response cache.
+
+        Args:
+            maxsize (int): Maximum responses kept in process; 0 disables the cache
+            ttl (int): Seconds a cached response stays valid
+            redis_url (Optional[str]): Redis connection URL for the shared tier
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl) if TTLCache is not None and maxsize > 0 else None
+        # TTLCache is not thread-safe, so every access goes through the lock
+        self._lock = threading.Lock()
+        self._redis = None
+        if self._local is not None and redis_url and redis is not None:
+            self._redis = redis.Redis.from_url(redis_url)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether responses are being cached."""
+        return self._local is not None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): Request hash
+
+        Returns:
+            Optional[Dict[str, Any]]: Cached provider response, or None on a miss
+        """
+        with self._lock:
+            response = self._local.get(key)
+        if response is None and self._redis is not None:
+            try:
+                payload = self._redis.get(key)
+            except redis.RedisError as e:
+                logger.warning("Response cache Redis lookup failed: %s", e)
+                payload = None
+            if payload is not None:
+                response = json.loads(payload)
+                with self._lock:
+                    self._local[key] = response
+
+        # Counters are best-effort; a lost increment under contention is harmless
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        logger.debug("Response cache %s for %s", "miss" if response is None else "hit", key[:12])
+        return response
+
+    def set(self, key: str, response: Dict[str, Any]):
+        """
+        Cache a provider response.
+
+        Args:
+            key (str): Request hash
+            response (Dict[str, Any]): Provider response to return for the same request
+        """
+        with self._lock:
+            self._local[key] = response
+        if self._redis is not None:
+            try:
+                self._redis.set(key, json.dumps(response), ex=self.ttl)
+            except redis.RedisError as e:
+                logger.warning("Response cache Redis write failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report cache effectiveness.
+
+        Returns:
+            Dict[str, Any]: Hit and miss counts, local entry count and
+                            whether the Redis tier is active
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._local) if self._local is not None else 0,
+            "redis": self._redis is not None
+        }
@@ -0,0 +1,16 @@
+#!/bin/bash
+
+# Production server for Trip Advisor - AI Agent
+# gevent workers serve each request on a greenlet, so one process can hold
+# many concurrent SSE streams open while they wait on the LLM provider.
+# Session history lives in process memory: keep a single worker unless
+# SESSION_REDIS_URL is set, which keeps every worker's copy in sync.
+# Keep-alive outlasts the usual 60s load balancer idle timeout, so proxies
+# reuse connections; gunicorn already sets TCP_NODELAY on its TCP sockets.
+
+exec gunicorn app:app \
+    --worker-class gevent \
+    --workers "${GUNICORN_WORKERS:-1}" \
+    --worker-connections "${GUNICORN_WORKER_CONNECTIONS:-1000}" \
+    --keep-alive "${GUNICORN_KEEPALIVE:-65}" \
+    --bind "${FLASK_HOST:-0.0.0.0}:${FLASK_PORT:-5001}"
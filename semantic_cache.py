@@ -0,0 +1,133 @@
+"""Semantic response cache for near-duplicate user queries"""
+
+import re
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Dict, Optional
+
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    np = None
+    SentenceTransformer = None
+
+if TYPE_CHECKING:
+    from agents.base_agent import AgentResult
+
+# Queries mentioning these words depend on live tool data and must not be
+# answered from an earlier response. Matched as whole words, so "know" or
+# "sometimes" do not count.
+_TIME_SENSITIVE_WORDS = re.compile(
+    r"\b(?:weather|forecast|time|now|today|tonight|tomorrow|current)\b",
+    re.IGNORECASE
+)
+
+class SemanticCache:
+    """In-process cache of responses keyed by query embedding similarity.
+
+    Paraphrased queries ("weather in Paris" vs "what's Paris weather like")
+    miss an exact-match cache. This cache embeds each query with a local
+    sentence-transformers model and returns a stored response when a
+    previous query's cosine similarity reaches the threshold.
+
+    Entries are grouped by namespace (e.g. provider and model) so responses
+    from one model are never served for another. Each namespace keeps at
+    most max_entries embeddings, evicting the oldest first; lookups are a
+    brute-force dot product, which is fast at that size and needs no
+    separate vector index.
+
+    Note:
+        - Requires the optional sentence-transformers package; check
+          `available` before use
+        - The embedding model is loaded lazily on first use
+    """
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", threshold: float = 0.92, max_entries: int = 1024):
+        """
+        Initialize an empty semantic cache.
+
+        Args:
+            model_name (str): sentence-transformers model used for embeddings
+            threshold (float): Minimum cosine similarity for a cache hit
+            max_entries (int): Maximum cached responses per namespace
+        """
+        self.model_name = model_name
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._model = None
+        self._entries: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """Whether the optional embedding dependencies are installed."""
+        return SentenceTransformer is not None
+
+    @staticmethod
+    def is_cacheable(message: str) -> bool:
+        """
+        Check whether a query may be answered from the cache.
+
+        Args:
+            message (str): The user query
+
+        Returns:
+            bool: False for time-sensitive queries (weather, time, ...)
+        """
+        return _TIME_SENSITIVE_WORDS.search(message) is None
+
+    def embed(self, message: str):
+        """
+        Embed a query as a unit-length vector.
+
+        Args:
+            message (str): The user query
+
+        Returns:
+            numpy.ndarray: Normalized embedding
+        """
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = SentenceTransformer(self.model_name)
+        return self._model.encode(message, normalize_embeddings=True)
+
+    def lookup(self, namespace: str, embedding) -> Optional["AgentResult"]:
+        """
+        Find the cached response for the most similar previous query.
+
+        Args:
+            namespace (str): Cache namespace, e.g. "provider:model"
+            embedding: Normalized query embedding from embed()
+
+        Returns:
+            Optional[AgentResult]: Cached result, or None if no previous
+                                   query is similar enough
+        """
+        with self._lock:
+            entries = self._entries.get(namespace)
+            if not entries:
+                return None
+            vectors, results = zip(*entries)
+
+        # Embeddings are normalized, so the dot product is cosine similarity
+        scores = np.stack(vectors) @ embedding
+        best = int(np.argmax(scores))
+        return results[best] if scores[best] >= self.threshold else None
+
+    def insert(self, namespace: str, embedding, result: "AgentResult"):
+        """
+        Cache a response under a query embedding.
+
+        Args:
+            namespace (str): Cache namespace, e.g. "provider:model"
+            embedding: Normalized query embedding from embed()
+            result (AgentResult): Result to return for similar queries
+        """
+        with self._lock:
+            entries = self._entries.get(namespace)
+            if entries is None:
+                entries = deque(maxlen=self.max_entries)
+                self._entries[namespace] = entries
+            entries.append((embedding, result))
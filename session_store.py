@@ -0,0 +1,138 @@
+"""Redis-backed persistence for conversation histories"""
+
+import json
+import logging
+from typing import List, Optional, Tuple
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+class RedisSessionStore:
+    """Write-through store of session histories kept in Redis.
+
+    Each session is a Redis list of JSON-encoded [role, content] pairs,
+    trimmed to the newest max_messages on every append and expiring after
+    ttl seconds without a write. Every append and clear also increments a
+    per-session version counter. Agents keep serving histories from memory
+    and compare their copy's version with the stored one on each access,
+    reloading the session when another process has written to or cleared
+    it. Sessions therefore survive restarts and stay consistent across
+    server processes without sticky routing.
+
+    Note:
+        - Version counters are only reset when a session expires, so a
+          cleared session never reuses a version another process has seen
+        - Redis errors are logged and treated as an empty or unsaved
+          history, so an unavailable Redis never fails a request
+    """
+
+    def __init__(self, url: str, ttl: int = 86400, max_messages: int = 200, prefix: str = "session:"):
+        """
+        Initialize the session store.
+
+        Args:
+            url (str): Redis connection URL
+            ttl (int): Seconds a session is kept after its last write
+            max_messages (int): Newest messages kept per session
+            prefix (str): Key prefix for session lists
+
+        Raises:
+            ImportError: If the redis package is not installed
+        """
+        if redis is None:
+            raise ImportError("The redis package is required for the Redis session store")
+        self.ttl = ttl
+        self.max_messages = max_messages
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+
+    def _version_key(self, session_id: str) -> str:
+        return self.prefix + session_id + ":version"
+
+    def version(self, session_id: str) -> Optional[int]:
+        """
+        Read a session's current version.
+
+        Args:
+            session_id (str): Session identifier
+
+        Returns:
+            Optional[int]: Version, 0 for a session never written, or None
+            if Redis could not be read
+        """
+        try:
+            version = self._redis.get(self._version_key(session_id))
+        except redis.RedisError as e:
+            logger.warning("Session store read failed for %s: %s", session_id, e)
+            return None
+        return int(version or 0)
+
+    def load(self, session_id: str) -> Tuple[Optional[int], List[Tuple[str, str]]]:
+        """
+        Read a session's stored messages and the version they reflect.
+
+        Args:
+            session_id (str): Session identifier
+
+        Returns:
+            Tuple[Optional[int], List[Tuple[str, str]]]: Version (None if
+            Redis could not be read) and (role, content) pairs, oldest first
+        """
+        try:
+            # MULTI/EXEC, so the messages match the version read with them
+            pipe = self._redis.pipeline()
+            pipe.get(self._version_key(session_id))
+            pipe.lrange(self.prefix + session_id, 0, -1)
+            version, payloads = pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Session store read failed for %s: %s", session_id, e)
+            return None, []
+        return int(version or 0), [tuple(json.loads(payload)) for payload in payloads]
+
+    def append(self, session_id: str, role: str, content: str) -> Optional[int]:
+        """
+        Append a message to a session and refresh its expiry.
+
+        Args:
+            session_id (str): Session identifier
+            role (str): Message role
+            content (str): Message content
+
+        Returns:
+            Optional[int]: The session's version after the append, or None
+            if the write failed
+        """
+        key = self.prefix + session_id
+        version_key = self._version_key(session_id)
+        try:
+            pipe = self._redis.pipeline()
+            pipe.rpush(key, json.dumps([role, content]))
+            pipe.ltrim(key, -self.max_messages, -1)
+            pipe.expire(key, self.ttl)
+            pipe.incr(version_key)
+            pipe.expire(version_key, self.ttl)
+            return pipe.execute()[3]
+        except redis.RedisError as e:
+            logger.warning("Session store write failed for %s: %s", session_id, e)
+            return None
+
+    def clear(self, session_id: str):
+        """
+        Delete a session's stored messages and bump its version.
+
+        Args:
+            session_id (str): Session identifier
+        """
+        version_key = self._version_key(session_id)
+        try:
+            pipe = self._redis.pipeline()
+            pipe.delete(self.prefix + session_id)
+            pipe.incr(version_key)
+            pipe.expire(version_key, self.ttl)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Session store delete failed for %s: %s", session_id, e)
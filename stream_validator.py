@@ -0,0 +1,61 @@
+"""Streaming validation of tool calls in LLM output"""
+
+import re
+from typing import Iterable, Optional
+
+# Tool call marker followed by the tool name, once the opening parenthesis
+# confirms the name is complete
+_TOOL_CALL_NAME = re.compile(r"TOOL_CALL:\s*(\w+)(?=\s*\()")
+
+# Characters carried over between chunks so a call split across chunk
+# boundaries is still recognized
+_MAX_PENDING = 64
+
+class StreamingToolValidator:
+    """Detects calls to unknown tools while a response is still streaming.
+
+    Tools are requested in the response text as TOOL_CALL: tool_name(...).
+    Feeding each chunk to push() reports the first call naming a tool that
+    is not registered, as soon as the name is complete, so the caller can
+    stop the upstream request instead of streaming (and paying for) the
+    rest of a response built around a hallucinated tool.
+
+    Only a short tail of unmatched text is kept between chunks, so each
+    chunk is scanned once regardless of how long the response grows.
+    """
+
+    def __init__(self, tool_names: Iterable[str]):
+        """
+        Initialize the validator.
+
+        Args:
+            tool_names (Iterable[str]): Names of the registered tools
+        """
+        self.tool_names = frozenset(tool_names)
+        self._pending = ""
+
+    def push(self, chunk: str) -> Optional[str]:
+        """
+        Scan the next chunk of streamed text.
+
+        Args:
+            chunk (str): Newly received response text
+
+        Returns:
+            Optional[str]: Name of the first unknown tool called, or None
+        """
+        text = self._pending + chunk
+        if "TOOL_CALL" not in text:
+            # A marker split across chunks survives in the kept tail
+            self._pending = text[-_MAX_PENDING:]
+            return None
+
+        checked = 0
+        for match in _TOOL_CALL_NAME.finditer(text):
+            if match.group(1) not in self.tool_names:
+                return match.group(1)
+            checked = match.end()
+
+        # Keep the unchecked tail, which may hold the start of a call
+        self._pending = text[max(checked, len(text) - _MAX_PENDING):]
+        return None
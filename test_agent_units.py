@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""Unit tests for the agent's caching, streaming and session helpers.
+
+Needs no API keys or running server. Run directly or with pytest:
+    python test_agent_units.py
+"""
+
+import contextvars
+import json
+import sys
+import threading
+import time
+import traceback
+from types import SimpleNamespace
+
+from agents import base_agent
+from agents.base_agent import BaseAgent, _count_tokens
+from agents.trip_agent import TripAgent, _match_plan_intent, _response_cache_key
+from openai_output_parser import OpenAIOutputParser, OpenAIParsedToken, OpenAITokenType
+from output_parser import OutputParser, ParsedToken, TokenType, batch_tokens
+from response_cache import ResponseCache
+from semantic_cache import SemanticCache
+from stream_validator import StreamingToolValidator
+
+def test_plan_intent_matches_plain_requests():
+    """Whole-message plan requests for known cities are recognized."""
+    assert _match_plan_intent("Plan me 3 days in Paris") == ("city_visit", {"city": "Paris", "days": 3})
+    assert _match_plan_intent("Can you plan a 2-day trip to Tokyo?") == ("city_visit", {"city": "Tokyo", "days": 2})
+    assert _match_plan_intent("plan 4 days in new york please") == ("city_visit", {"city": "New York", "days": 4})
+
+def test_plan_intent_rejects_extra_clauses():
+    """Requests carrying anything beyond the plan go to the LLM."""
+    assert _match_plan_intent("Plan 3 days in Paris and tell me about the food") is None
+    assert _match_plan_intent("Tell me about the food and plan 3 days in Paris") is None
+    assert _match_plan_intent("Plan 3 days in Paris, I love museums") is None
+
+def test_plan_intent_rejects_unknown_cities_and_day_counts():
+    """Only cities with tool data and 1-14 days qualify."""
+    assert _match_plan_intent("Plan 3 days in Berlin") is None
+    assert _match_plan_intent("Plan 30 days in Paris") is None
+    assert _match_plan_intent("Plan 0 days in Paris") is None
+
+def test_cached_plan_reply():
+    """A cached plan is answered as a composed reply, not raw tool output."""
+    reply = TripAgent()._run_cached_plan("city_visit", {"city": "Paris", "days": 2})
+    assert reply.startswith("Here's what I put together for your 2-day visit to Paris.")
+    for heading in ("**Weather**", "**About Paris**", "**Itinerary**"):
+        assert heading in reply
+    assert "Day 2:" in reply and "Day 3:" not in reply
+
+def test_semantic_cache_time_sensitive_words():
+    """Time-sensitive queries bypass the semantic cache; whole words only."""
+    for message in ("What's the weather in Rome?", "What TIME is it in Tokyo", "Anything on tonight?"):
+        assert not SemanticCache.is_cacheable(message), message
+    for message in ("Do you know Paris?", "I sometimes travel alone", "Tell me about Paris"):
+        assert SemanticCache.is_cacheable(message), message
+
+def test_response_cache_key_only_for_temperature_zero():
+    """Only deterministic requests get a response cache key."""
+    sampled = SimpleNamespace(provider="openai", model_name="gpt-4o", temperature=0.7)
+    deterministic = SimpleNamespace(provider="openai", model_name="gpt-4o", temperature=0)
+    assert _response_cache_key(sampled, "system", "prompt") is None
+    
+    key = _response_cache_key(deterministic, "system", "prompt")
+    assert key is not None and len(key) == 64
+    assert _response_cache_key(deterministic, "system", "prompt") == key
+    assert _response_cache_key(deterministic, "system", "other prompt") != key
+
+def test_response_cache_round_trip():
+    """Cached responses are returned and hits and misses are counted."""
+    cache = ResponseCache(maxsize=2, ttl=60)
+    assert cache.get("key") is None
+    cache.set("key", {"response": "Hi"})
+    assert cache.get("key") == {"response": "Hi"}
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1, "redis": False}
+    assert not ResponseCache(maxsize=0).enabled
+
+def test_stream_validator_flags_unknown_tool_split_across_chunks():
+    """Unknown tools are reported once the name is complete, across chunks."""
+    validator = StreamingToolValidator(["weather_tool"])
+    assert validator.push("Let me check TOOL_CA") is None
+    assert validator.push("LL: wea") is None
+    assert validator.push("ther_tool('Paris')") is None
+    assert validator.push(" then TOOL_CALL: flights_") is None
+    assert validator.push("tool('Paris')") == "flights_tool"
+
+def test_stream_validator_ignores_plain_text():
+    """Text without tool calls never trips the validator."""
+    validator = StreamingToolValidator(["weather_tool"])
+    assert all(validator.push("A calm day by the river. ") is None for _ in range(50))
+
+def test_batch_tokens_merges_runs_and_keeps_control_tokens():
+    """Content runs are merged; control tokens pass through in order."""
+    tokens = [
+        ParsedToken("", TokenType.THINKING_START),
+        ParsedToken("a", TokenType.THINKING, {"thinking_length": 1}),
+        ParsedToken("b", TokenType.THINKING, {"thinking_length": 2}),
+        ParsedToken("", TokenType.THINKING_END),
+        ParsedToken("Hello", TokenType.RESPONSE, {"response_length": 5}),
+        ParsedToken(" world", TokenType.RESPONSE, {"response_length": 11}),
+        ParsedToken("", TokenType.COMPLETE),
+    ]
+    batched = list(batch_tokens(iter(tokens), max_chars=64, max_delay=60))
+    assert [(token.token_type, token.content) for token in batched] == [
+        (TokenType.THINKING_START, ""),
+        (TokenType.THINKING, "ab"),
+        (TokenType.THINKING_END, ""),
+        (TokenType.RESPONSE, "Hello world"),
+        (TokenType.COMPLETE, ""),
+    ]
+    # Merged tokens carry the latest cumulative metadata
+    assert batched[3].metadata == {"response_length": 11}
+
+def test_batch_tokens_flushes_at_size_and_can_be_disabled():
+    """Runs are flushed at max_chars; max_chars=0 leaves tokens untouched."""
+    tokens = [ParsedToken("abcd", TokenType.RESPONSE) for _ in range(5)]
+    batched = list(batch_tokens(iter(tokens), max_chars=8, max_delay=60))
+    assert [token.content for token in batched] == ["abcdabcd", "abcdabcd", "abcd"]
+    assert list(batch_tokens(iter(tokens), max_chars=0)) == tokens
+
+def test_session_eviction_keeps_recently_written():
+    """Beyond max_sessions, the least recently written sessions are evicted."""
+    agent = BaseAgent(max_sessions=10)
+    for i in range(10):
+        agent.add_to_history(f"s{i}", "user", "hello")
+    # Writing to s0 makes s1 and s2 the least recently written
+    agent.add_to_history("s0", "assistant", "hi")
+    agent.add_to_history("s10", "user", "hello")
+    
+    # One session over the limit, plus a tenth of max_sessions of headroom
+    assert agent.evicted_sessions == 2
+    assert "s1" not in agent.session_histories and "s2" not in agent.session_histories
+    assert "s0" in agent.session_histories and "s10" in agent.session_histories
+    assert len(agent.get_session_history("s0")) == 2
+
+def test_history_token_budget_keeps_newest():
+    """The token budget drops the oldest lines and always keeps the newest."""
+    agent = BaseAgent()
+    for i in range(3):
+        agent.add_to_history("s", "user", f"message number {i}")
+    lines = [f"User: message number {i}" for i in range(3)]
+    
+    budget = _count_tokens(lines[1]) + _count_tokens(lines[2])
+    assert agent.format_conversation_history("s", max_tokens=budget) == "\n".join(lines[1:])
+    assert agent.format_conversation_history("s", max_tokens=1) == lines[2]
+    assert agent.format_conversation_history("s", max_tokens=0) == "\n".join(lines)
+
+def test_token_count_falls_back_when_encoding_cannot_load():
+    """An encoding that fails to load (e.g. offline) falls back to the estimate."""
+    def offline(name):
+        raise ConnectionError("no network")
+    
+    get_encoding = base_agent.tiktoken.get_encoding
+    base_agent.tiktoken.get_encoding = offline
+    base_agent._get_encoding.cache_clear()
+    base_agent._encoding_unavailable = False
+    try:
+        assert base_agent._count_tokens("x" * 40) == 11
+        assert base_agent._encoding_unavailable
+    finally:
+        base_agent.tiktoken.get_encoding = get_encoding
+        base_agent._get_encoding.cache_clear()
+        base_agent._encoding_unavailable = False
+
+class _MemorySessionStore:
+    """In-process stand-in for RedisSessionStore, shared by several agents."""
+    
+    def __init__(self):
+        self.sessions = {}
+        self.versions = {}
+    
+    def version(self, session_id):
+        return self.versions.get(session_id, 0)
+    
+    def load(self, session_id):
+        return self.version(session_id), list(self.sessions.get(session_id, ()))
+    
+    def append(self, session_id, role, content):
+        self.sessions.setdefault(session_id, []).append((role, content))
+        self.versions[session_id] = self.version(session_id) + 1
+        return self.versions[session_id]
+    
+    def clear(self, session_id):
+        self.sessions.pop(session_id, None)
+        self.versions[session_id] = self.version(session_id) + 1
+
+def _contents(agent, session_id):
+    return [msg["content"] for msg in agent.get_session_history(session_id)]
+
+def test_session_store_keeps_workers_in_sync():
+    """Workers sharing a session store see each other's writes and clears."""
+    store = _MemorySessionStore()
+    first, second = BaseAgent(session_store=store), BaseAgent(session_store=store)
+    
+    first.add_to_history("s", "user", "one")
+    second.add_to_history("s", "assistant", "two")
+    first.add_to_history("s", "user", "three")
+    assert _contents(first, "s") == _contents(second, "s") == ["one", "two", "three"]
+    assert second.format_conversation_history("s") == "User: one\nAssistant: two\nUser: three"
+    
+    second.clear_session_history("s")
+    assert _contents(first, "s") == []
+    # A stale worker's next write does not bring the cleared history back
+    first.add_to_history("s", "user", "fresh")
+    assert store.sessions["s"] == [("user", "fresh")]
+    assert _contents(second, "s") == ["fresh"]
+
+def test_session_history_is_plain_dicts():
+    """get_session_history hands out JSON-serializable {"role", "content"} dicts."""
+    agent = BaseAgent()
+    agent.add_to_history("s", "user", "Bonjour, ça va?")
+    history = agent.get_session_history("s")
+    assert isinstance(history, tuple) and isinstance(history[0], dict)
+    assert json.loads(json.dumps(history)) == [{"role": "user", "content": "Bonjour, ça va?"}]
+    assert agent.create_initial_state("s")["messages"] == [{"role": "user", "content": "Bonjour, ça va?"}]
+
+def test_session_history_reuses_snapshot_until_written():
+    """Repeat reads in one context return the cached snapshot until a write."""
+    agent = BaseAgent()
+    agent.add_to_history("s", "user", "hello")
+    
+    def read_twice():
+        first = agent.get_session_history("s")
+        return first, agent.get_session_history("s")
+    
+    first, again = contextvars.copy_context().run(read_twice)
+    assert again is first
+    
+    # Another context does not see this one's snapshot
+    other, _ = contextvars.copy_context().run(read_twice)
+    assert other is not first and other == first
+    
+    def read_write_read():
+        before = agent.get_session_history("s")
+        agent.add_to_history("s", "assistant", "hi")
+        after = agent.get_session_history("s")
+        return before, after, agent.get_session_history("s")
+    
+    before, after, after_again = contextvars.copy_context().run(read_write_read)
+    assert len(before) == 1 and len(after) == 2
+    assert after_again is after
+    
+    # Another session never gets this session's snapshot
+    agent.add_to_history("t", "user", "other")
+    assert contextvars.copy_context().run(
+        lambda: (agent.get_session_history("s"), agent.get_session_history("t"))[1]
+    ) == ({"role": "user", "content": "other"},)
+
+def _append_concurrently(agent, writers, per_writer, disturb):
+    """Append from several threads while disturb() runs repeatedly in another.
+    
+    Returns:
+        Versions of session "s" sampled while the writers ran
+    """
+    done = threading.Event()
+    versions = []
+    
+    def write(writer):
+        for i in range(per_writer):
+            agent.add_to_history("s", "user", f"{writer}:{i}")
+    
+    def meddle():
+        while not done.is_set():
+            disturb()
+            versions.append(agent._versions.get("s", 0))
+    
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=write, args=(w,)) for w in range(writers)]
+        meddler = threading.Thread(target=meddle)
+        meddler.start()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        done.set()
+        meddler.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    return versions
+
+def test_concurrent_appends_survive_history_rebuilds():
+    """Appends racing optimize_memory rebuilds are neither lost nor duplicated."""
+    writers, per_writer = 8, 300
+    agent = BaseAgent(max_history=100000)
+    bounds = iter(range(99000, writers * per_writer, -100))
+    versions = _append_concurrently(
+        agent, writers, per_writer, lambda: agent.optimize_memory("s", next(bounds, writers * per_writer))
+    )
+    
+    contents = [msg["content"] for msg in agent.get_session_history("s")]
+    expected = {f"{w}:{i}" for w in range(writers) for i in range(per_writer)}
+    assert len(contents) == len(expected) and set(contents) == expected
+    assert versions == sorted(versions)
+    # Each writer's messages keep their order
+    for w in range(writers):
+        mine = [int(c.split(":")[1]) for c in contents if c.startswith(f"{w}:")]
+        assert mine == sorted(mine)
+
+def test_concurrent_appends_survive_clears():
+    """Appends racing clears never duplicate a message or reorder a writer."""
+    writers, per_writer = 8, 300
+    agent = BaseAgent(max_history=100000)
+    versions = _append_concurrently(agent, writers, per_writer, lambda: agent.clear_session_history("s"))
+    
+    contents = [msg["content"] for msg in agent.get_session_history("s")]
+    assert len(contents) == len(set(contents))
+    # A clear resets the version; otherwise versions only increase
+    assert all(b >= a or b == 0 for a, b in zip(versions, versions[1:]))
+    # What survives of each writer is an in-order run up to its last message
+    for w in range(writers):
+        mine = [int(c.split(":")[1]) for c in contents if c.startswith(f"{w}:")]
+        assert mine == list(range(per_writer - len(mine), per_writer))
+
+class _EchoAgent(BaseAgent):
+    """Agent answering with its input; "slow" messages take longer."""
+    
+    def process_message(self, message, session_id="default"):
+        time.sleep(0.2 if message == "slow" else 0.01)
+        return {"response": message, "session_id": session_id}
+
+def test_process_batch_keeps_input_order():
+    """Batch results come back in input order, with items run concurrently."""
+    started = time.monotonic()
+    results = _EchoAgent().process_batch(["slow", "a", "b"], ["s1", "s2", "s3"])
+    assert time.monotonic() - started < 0.4
+    assert results == [
+        {"response": "slow", "session_id": "s1"},
+        {"response": "a", "session_id": "s2"},
+        {"response": "b", "session_id": "s3"},
+    ]
+    try:
+        _EchoAgent().process_batch(["a", "b"], ["s1"])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("mismatched batch lengths were accepted")
+
+def _stub_provider(name, reply):
+    """Provider stand-in whose generate_response returns reply."""
+    return SimpleNamespace(
+        provider=name, model_name=f"{name}-model", temperature=0.7,
+        generate_response=lambda prompt, **kwargs: reply
+    )
+
+def test_provider_failures_stay_out_of_history():
+    """Provider-reported failures are returned as errors, not added to history."""
+    rate_limited = {"success": False, "response": "Rate limit exceeded", "rate_limited": True}
+    agent = TripAgent(_stub_provider("groq", rate_limited))
+    result = agent.process_message("What is there to do in Lisbon?", "s")
+    assert result["success"] is False and result["rate_limited"] is True
+    assert result["response"] == result["error"] == "Rate limit exceeded"
+    assert agent.get_session_history("s") == ()
+    
+    agent.llm_provider = _stub_provider("groq", {"success": True, "response": "Visit Belem."})
+    result = agent.process_message("What is there to do in Lisbon?", "s")
+    assert result["success"] is True and result["response"] == "Visit Belem."
+    assert [msg["role"] for msg in agent.get_session_history("s")] == ["user", "assistant"]
+
+def test_provider_override_applies_to_one_request():
+    """A per-request provider override leaves the agent's provider untouched."""
+    default = _stub_provider("groq", {"success": True, "response": "From groq"})
+    agent = TripAgent(default)
+    agent._providers["perplexity"] = _stub_provider("perplexity", {"success": True, "response": "From perplexity"})
+    
+    result = agent.process_message("Hello", "s", provider="perplexity")
+    assert (result["provider"], result["model"], result["response"]) == (
+        "perplexity", "perplexity-model", "From perplexity"
+    )
+    assert agent.llm_provider is default
+    assert agent.process_message("Hello", "s")["response"] == "From groq"
+
+def test_sse_bytes_frames_match_str_frames():
+    """The bytes SSE formatters match the str ones byte for byte."""
+    parser = OutputParser()
+    tokens = [
+        ParsedToken("Hello", TokenType.RESPONSE, {"response_length": 5}),
+        ParsedToken("Café 東京 ☀", TokenType.THINKING, {"thinking_length": 9, "ratio": 0.5}),
+        ParsedToken("", TokenType.COMPLETE),
+    ]
+    for token in tokens:
+        frame = parser.format_for_sse_bytes(token)
+        assert frame == parser.format_for_sse(token).encode("utf-8")
+        assert frame.startswith(b"data: ") and frame.endswith(b"\n\n")
+        payload = json.loads(frame[6:])
+        assert payload["token"] == token.content and payload["type"] == token.token_type.value
+    
+    openai_parser = OpenAIOutputParser()
+    openai_token = OpenAIParsedToken(
+        "Olá", OpenAITokenType.OPENAI_CONTENT, {"chunk": 1}, raw_delta={"content": "Olá"}, finish_reason="stop"
+    )
+    assert openai_parser.format_openai_for_sse_bytes(openai_token) == (
+        openai_parser.format_openai_for_sse(openai_token).encode("utf-8")
+    )
+
+def test_clean_full_response_matches_streaming_parse():
+    """The one-pass cleaner gives the same answer as parsing the stream."""
+    streams = [
+        ["<thinking>", "plan", "</thinking>", "Visit Rome."],
+        ["<think>", "a", "</think>", " Go. "],
+        ["<reasoning>", "x", "</reasoning>", "Hi"],
+        ["<ANALYSIS>", "x", "</ANALYSIS>", "Hi"],
+        ["Just an answer."],
+        ["<thinking>", "never closed"],
+    ]
+    for tokens in streams:
+        parser = OutputParser(enable_terminal_logging=False)
+        list(parser.parse_stream(iter(tokens)))
+        expected = parser.extract_final_response()
+        assert OutputParser(enable_terminal_logging=False).clean_full_response("".join(tokens)) == expected, tokens
+    assert OutputParser(enable_terminal_logging=False).clean_full_response("Hi</thinking> there") == "Hi there"
+
+def test_stream_response_yields_encoded_frames():
+    """stream_response yields ready-to-write bytes SSE frames and records the answer."""
+    provider = _stub_provider("groq", None)
+    provider.stream_response = lambda prompt, **kwargs: iter(["<thinking>", "hm", "</thinking>", "Hola ", "Sevilla"])
+    agent = TripAgent(provider)
+    
+    frames = list(agent.stream_response("Where should I go?", "s"))
+    assert frames and all(isinstance(frame, bytes) for frame in frames)
+    payloads = [json.loads(frame[len(b"data: "):]) for frame in frames]
+    assert all(frame.startswith(b"data: ") and frame.endswith(b"\n\n") for frame in frames)
+    assert "".join(p["token"] for p in payloads if p["type"] == "response") == "Hola Sevilla"
+    assert agent.get_session_history("s")[-1] == {"role": "assistant", "content": "Hola Sevilla"}
+
+def main():
+    """Run all tests."""
+    print("🧪 Running agent unit tests\n")
+    
+    tests = [value for name, value in globals().items() if name.startswith("test_") and callable(value)]
+    
+    passed = 0
+    total = len(tests)
+    
+    for test in tests:
+        try:
+            test()
+        except Exception:
+            print(f"❌ {test.__name__}")
+            traceback.print_exc()
+        else:
+            print(f"✅ {test.__name__}")
+            passed += 1
+    
+    print(f"\n📊 Test Results: {passed}/{total} tests passed")
+    return 0 if passed == total else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
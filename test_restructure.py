@@ -114,7 +114,7 @@ def test_app_import():
     try:
         import app
         print("✅ Flask app imported successfully")
-        print(f"Agent initialized: {hasattr(app, 'agent')}")
+        print(f"Agent accessor available: {hasattr(app, 'get_agent')}")
         return True
     except Exception as e:
         print(f"❌ Flask app import failed: {e}")
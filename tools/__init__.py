@@ -3,25 +3,32 @@
 This package contains all the tools available to the agent.
 """
 
+from types import MappingProxyType
+
 from .weather_tool import weather_tool
 from .time_tool import time_tool
-from .city_facts_tool import city_facts_tool
-from .plan_city_visit_tool import plan_city_visit_tool
+from .city_facts_tool import city_facts_tool, CITIES_WITH_FACTS
+from .plan_city_visit_tool import plan_city_visit_tool, CITIES_WITH_PLANS
 
 __all__ = [
     'weather_tool',
     'time_tool', 
     'city_facts_tool',
-    'plan_city_visit_tool'
+    'plan_city_visit_tool',
+    'KNOWN_CITIES'
 ]
 
-# Tool registry for easy access and LangGraph integration
-TOOL_REGISTRY = {
+# Casefolded names of the cities every city tool has data for
+KNOWN_CITIES = CITIES_WITH_FACTS & CITIES_WITH_PLANS
+
+# Tool registry for easy access and LangGraph integration.
+# The tool set is fixed at import time, so expose a read-only view.
+TOOL_REGISTRY = MappingProxyType({
     'weather_tool': weather_tool,
     'time_tool': time_tool,
     'city_facts_tool': city_facts_tool,
     'plan_city_visit_tool': plan_city_visit_tool
-}
+})
 
 def get_all_tools():
     """Get all available tools as a list.
@@ -1,6 +1,46 @@
 """City facts tool for getting interesting information about cities."""
 
-from typing import Dict, Any
+from types import MappingProxyType
+
+# Simulated city facts database, keyed by casefolded city name
+_CITY_FACTS_DATA = {
+    "paris": {
+        "population": "2.1 million",
+        "famous_for": "Eiffel Tower, Louvre Museum, fashion",
+        "fun_fact": "Paris has more dogs than children!",
+        "best_time_to_visit": "April to June, September to October"
+    },
+    "tokyo": {
+        "population": "13.9 million",
+        "famous_for": "Technology, anime, sushi",
+        "fun_fact": "Tokyo has the world's busiest train station (Shinjuku)",
+        "best_time_to_visit": "March to May, September to November"
+    },
+    "new york": {
+        "population": "8.3 million",
+        "famous_for": "Statue of Liberty, Broadway, Central Park",
+        "fun_fact": "New York City has over 800 languages spoken!",
+        "best_time_to_visit": "April to June, September to November"
+    },
+    "london": {
+        "population": "8.9 million",
+        "famous_for": "Big Ben, Tower Bridge, British Museum",
+        "fun_fact": "London has over 170 museums!",
+        "best_time_to_visit": "May to September"
+    }
+}
+
+# Fact text rendered once per city, so a lookup is the only per-call work
+_CITY_FACTS = MappingProxyType({
+    name: (
+        f"Population: {facts['population']}, Famous for: {facts['famous_for']}, "
+        f"Fun fact: {facts['fun_fact']}, Best time to visit: {facts['best_time_to_visit']}"
+    )
+    for name, facts in _CITY_FACTS_DATA.items()
+})
+
+# Casefolded names of the cities this tool has facts for
+CITIES_WITH_FACTS = frozenset(_CITY_FACTS)
 
 def city_facts_tool(city: str) -> str:
     """
@@ -13,38 +53,9 @@ def city_facts_tool(city: str) -> str:
         str: Interesting facts about the city
     """
     try:
-        # Simulated city facts database
-        city_facts = {
-            "paris": {
-                "population": "2.1 million",
-                "famous_for": "Eiffel Tower, Louvre Museum, fashion",
-                "fun_fact": "Paris has more dogs than children!",
-                "best_time_to_visit": "April to June, September to October"
-            },
-            "tokyo": {
-                "population": "13.9 million",
-                "famous_for": "Technology, anime, sushi",
-                "fun_fact": "Tokyo has the world's busiest train station (Shinjuku)",
-                "best_time_to_visit": "March to May, September to November"
-            },
-            "new york": {
-                "population": "8.3 million",
-                "famous_for": "Statue of Liberty, Broadway, Central Park",
-                "fun_fact": "New York City has over 800 languages spoken!",
-                "best_time_to_visit": "April to June, September to November"
-            },
-            "london": {
-                "population": "8.9 million",
-                "famous_for": "Big Ben, Tower Bridge, British Museum",
-                "fun_fact": "London has over 170 museums!",
-                "best_time_to_visit": "May to September"
-            }
-        }
-        
-        city_lower = city.lower()
-        if city_lower in city_facts:
-            facts = city_facts[city_lower]
-            return f"Facts about {city}: Population: {facts['population']}, Famous for: {facts['famous_for']}, Fun fact: {facts['fun_fact']}, Best time to visit: {facts['best_time_to_visit']}"
+        facts = _CITY_FACTS.get(city.casefold())
+        if facts is not None:
+            return f"Facts about {city}: {facts}"
         else:
             return f"I don't have specific facts about {city} in my database, but I'd be happy to help you plan a visit there!"
     except Exception as e:
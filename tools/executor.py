@@ -0,0 +1,53 @@
+"""Shared worker pool for running independent tool calls concurrently."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, List, Optional, Sequence, Tuple
+
+# Worker pool shared by agents and providers for concurrent tool calls
+_TOOL_WORKERS = 8
+_tool_executor: Optional[ThreadPoolExecutor] = None
+_tool_executor_lock = threading.Lock()
+
+def get_tool_executor() -> ThreadPoolExecutor:
+    """Get the shared tool worker pool, creating it on first use.
+    
+    Returns:
+        The shared ThreadPoolExecutor
+    """
+    global _tool_executor
+    if _tool_executor is None:
+        with _tool_executor_lock:
+            if _tool_executor is None:
+                _tool_executor = ThreadPoolExecutor(max_workers=_TOOL_WORKERS, thread_name_prefix="agent-tool")
+    return _tool_executor
+
+def run_tool_calls(calls: Sequence[Tuple[str, Callable[[], str]]], timeout: float = 10.0) -> List[Optional[str]]:
+    """Run independent tool calls concurrently on the shared pool.
+    
+    All calls start at once, so the batch takes about as long as its
+    slowest tool rather than the sum of all of them. A single call runs
+    inline. A call still running after the timeout is reported as None;
+    its worker finishes in the background.
+    
+    Args:
+        calls: (tool name, zero-argument callable) pairs
+        timeout: Seconds to wait for the whole batch
+    
+    Returns:
+        Results in the same order as calls, None for calls that timed out
+    """
+    if len(calls) == 1:
+        return [calls[0][1]()]
+    
+    executor = get_tool_executor()
+    futures = [executor.submit(call) for _, call in calls]
+    deadline = time.monotonic() + timeout
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+        except FutureTimeoutError:
+            results.append(None)
+    return results
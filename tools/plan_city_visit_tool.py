@@ -1,6 +1,42 @@
 """City visit planning tool for creating travel itineraries."""
 
-from typing import Dict, Any, Optional
+from types import MappingProxyType
+from typing import Optional
+
+# Simulated travel plans database, keyed by casefolded city name
+_CITY_PLANS = MappingProxyType({
+    "paris": {
+        "day1": "Visit Eiffel Tower, Seine River cruise, Champs-Élysées",
+        "day2": "Louvre Museum, Notre-Dame Cathedral, Latin Quarter",
+        "day3": "Montmartre, Sacré-Cœur, local cafés and bistros",
+        "food": "Try croissants, escargot, and French wine",
+        "transport": "Use Metro system, very efficient"
+    },
+    "tokyo": {
+        "day1": "Shibuya Crossing, Harajuku, Meiji Shrine",
+        "day2": "Tsukiji Fish Market, Imperial Palace, Ginza",
+        "day3": "Asakusa Temple, Tokyo Skytree, traditional neighborhoods",
+        "food": "Try sushi, ramen, and street food",
+        "transport": "JR Pass for trains, very punctual"
+    },
+    "new york": {
+        "day1": "Central Park, Times Square, Broadway show",
+        "day2": "Statue of Liberty, 9/11 Memorial, Wall Street",
+        "day3": "Brooklyn Bridge, High Line, local neighborhoods",
+        "food": "Try pizza, bagels, and diverse cuisine",
+        "transport": "Subway system, walking, yellow cabs"
+    },
+    "london": {
+        "day1": "Big Ben, Westminster Abbey, Thames River",
+        "day2": "Tower of London, Tower Bridge, Borough Market",
+        "day3": "British Museum, Covent Garden, Hyde Park",
+        "food": "Try fish and chips, afternoon tea, pub food",
+        "transport": "Underground (Tube), buses, walking"
+    }
+})
+
+# Casefolded names of the cities this tool has plans for
+CITIES_WITH_PLANS = frozenset(_CITY_PLANS)
 
 def plan_city_visit_tool(city: str, days: int = 3, interests: Optional[str] = None) -> str:
     """
@@ -15,42 +51,8 @@ def plan_city_visit_tool(city: str, days: int = 3, interests: Optional[str] = No
         str: A detailed travel plan for the city
     """
     try:
-        # Simulated travel plans database
-        city_plans = {
-            "paris": {
-                "day1": "Visit Eiffel Tower, Seine River cruise, Champs-Élysées",
-                "day2": "Louvre Museum, Notre-Dame Cathedral, Latin Quarter",
-                "day3": "Montmartre, Sacré-Cœur, local cafés and bistros",
-                "food": "Try croissants, escargot, and French wine",
-                "transport": "Use Metro system, very efficient"
-            },
-            "tokyo": {
-                "day1": "Shibuya Crossing, Harajuku, Meiji Shrine",
-                "day2": "Tsukiji Fish Market, Imperial Palace, Ginza",
-                "day3": "Asakusa Temple, Tokyo Skytree, traditional neighborhoods",
-                "food": "Try sushi, ramen, and street food",
-                "transport": "JR Pass for trains, very punctual"
-            },
-            "new york": {
-                "day1": "Central Park, Times Square, Broadway show",
-                "day2": "Statue of Liberty, 9/11 Memorial, Wall Street",
-                "day3": "Brooklyn Bridge, High Line, local neighborhoods",
-                "food": "Try pizza, bagels, and diverse cuisine",
-                "transport": "Subway system, walking, yellow cabs"
-            },
-            "london": {
-                "day1": "Big Ben, Westminster Abbey, Thames River",
-                "day2": "Tower of London, Tower Bridge, Borough Market",
-                "day3": "British Museum, Covent Garden, Hyde Park",
-                "food": "Try fish and chips, afternoon tea, pub food",
-                "transport": "Underground (Tube), buses, walking"
-            }
-        }
-        
-        city_lower = city.lower()
-        if city_lower in city_plans:
-            plan = city_plans[city_lower]
-            
+        plan = _CITY_PLANS.get(city.casefold())
+        if plan is not None:
             itinerary = f"Here's a {days}-day plan for {city}:\n\n"
             
             # Add day-by-day itinerary based on requested days
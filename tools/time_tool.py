@@ -1,9 +1,26 @@
 """Time tool for getting current time information."""
 
+import functools
 from datetime import datetime
 import pytz
 from typing import Optional
 
+@functools.lru_cache(maxsize=128)
+def _get_zone(timezone: str):
+    """
+    Resolve a timezone name once; later calls reuse the tzinfo.
+    
+    Args:
+        timezone (str): Timezone name (e.g., 'US/Eastern')
+        
+    Returns:
+        The pytz timezone, or None if the name is unknown
+    """
+    try:
+        return pytz.timezone(timezone)
+    except pytz.exceptions.UnknownTimeZoneError:
+        return None
+
 def time_tool(timezone: Optional[str] = None) -> str:
     """
     Get current time, optionally for a specific timezone.
@@ -16,11 +33,11 @@ def time_tool(timezone: Optional[str] = None) -> str:
     """
     try:
         if timezone:
-            try:
-                tz = pytz.timezone(timezone)
+            tz = _get_zone(timezone)
+            if tz is not None:
                 current_time = datetime.now(tz)
                 return f"Current time in {timezone}: {current_time.strftime('%Y-%m-%d %H:%M:%S %Z')}"
-            except pytz.exceptions.UnknownTimeZoneError:
+            else:
                 # Fallback to UTC if timezone is invalid
                 current_time = datetime.now(pytz.UTC)
                 return f"Invalid timezone '{timezone}'. Current UTC time: {current_time.strftime('%Y-%m-%d %H:%M:%S %Z')}"
@@ -4,6 +4,21 @@ import requests
 import json
 from typing import Dict, Any
 
+# Using a free weather API (OpenWeatherMap requires API key in production)
+# For demo purposes, we'll simulate weather data
+_WEATHER_DATA = {
+    "temperature": "22°C",
+    "condition": "Partly cloudy",
+    "humidity": "65%",
+    "wind_speed": "10 km/h"
+}
+
+# Report text rendered once, since the simulated data never changes
+_SIMULATED_WEATHER = (
+    f"{_WEATHER_DATA['temperature']}, {_WEATHER_DATA['condition']}. "
+    f"Humidity: {_WEATHER_DATA['humidity']}, Wind: {_WEATHER_DATA['wind_speed']}"
+)
+
 def weather_tool(location: str) -> str:
     """
     Get current weather information for a specific location.
@@ -15,16 +30,6 @@ def weather_tool(location: str) -> str:
         str: Weather information in a readable format
     """
     try:
-        # Using a free weather API (OpenWeatherMap requires API key in production)
-        # For demo purposes, we'll simulate weather data
-        weather_data = {
-            "location": location,
-            "temperature": "22°C",
-            "condition": "Partly cloudy",
-            "humidity": "65%",
-            "wind_speed": "10 km/h"
-        }
-        
-        return f"Weather in {location}: {weather_data['temperature']}, {weather_data['condition']}. Humidity: {weather_data['humidity']}, Wind: {weather_data['wind_speed']}"
+        return f"Weather in {location}: {_SIMULATED_WEATHER}"
     except Exception as e:
         return f"Sorry, I couldn't get weather information for {location}. Error: {str(e)}"
\ No newline at end of file
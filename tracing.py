@@ -0,0 +1,48 @@
+"""LangSmith tracing hooks that cost nothing when tracing is disabled"""
+
+import functools
+import random
+
+from config import Config
+
+if Config.LANGSMITH_TRACING:
+    from langsmith import traceable as _langsmith_traceable
+
+    def traceable(*args, **kwargs):
+        """
+        langsmith.traceable with head-based sampling.
+
+        Each call is traced with probability LANGSMITH_SAMPLE_RATE and
+        otherwise runs the undecorated function, so tracing traffic stays
+        proportional to the sample rather than to the request rate. At a
+        rate of 1 this is langsmith.traceable unchanged.
+        Supports both the bare @traceable and the @traceable(...) forms.
+        """
+        def decorate(func):
+            traced = _langsmith_traceable(**kwargs)(func)
+            sample_rate = Config.LANGSMITH_SAMPLE_RATE
+            if sample_rate >= 1:
+                return traced
+
+            @functools.wraps(func)
+            def sampled(*call_args, **call_kwargs):
+                if random.random() < sample_rate:
+                    return traced(*call_args, **call_kwargs)
+                return func(*call_args, **call_kwargs)
+            return sampled
+
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return decorate(args[0])
+        return decorate
+else:
+    def traceable(*args, **kwargs):
+        """
+        Stand-in for langsmith.traceable used when tracing is disabled.
+
+        Returns the decorated function unchanged, so calls pay no span
+        creation or context propagation and langsmith is never imported.
+        Supports both the bare @traceable and the @traceable(...) forms.
+        """
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func